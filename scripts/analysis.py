@@ -1,62 +1,89 @@
+import argparse
 import pandas as pd
 import yaml
-from collections import defaultdict
-from datetime import datetime
+from pathlib import Path
 
-def load_config():
-    with open("config.yaml") as f:
+BIRTH_YEAR_COLUMNS = ['Birth Year', 'Birthday', 'Год рождения']
+
+REGION_MAPPING = {
+    "Москва": "Москва",
+    "Московская область": "Москва",
+    "Калининград": "Калининград",
+    "Калининградская область": "Калининград"
+}
+
+def load_config(config_path="config.yaml"):
+    with open(config_path, encoding="utf-8") as f:
         return yaml.safe_load(f)["trends"]
 
+def trend_targets(config):
+    """Список (входной рейтинг, файл общей статистики, файл детальной статистики).
+
+    Рейтинги перечисляются в trends.rankings как {имя: путь к CSV}, результаты
+    пишутся в trends.output_dir. Старый формат с одним input_ranking_file
+    тоже поддерживается.
+    """
+    targets = []
+    output_dir = Path(config.get("output_dir", "output/trends"))
+    for name, ranking_file in (config.get("rankings") or {}).items():
+        targets.append((
+            ranking_file,
+            output_dir / f"general_{name}_stats.csv",
+            output_dir / f"detailed_{name}_stats.csv"
+        ))
+    if "input_ranking_file" in config:
+        targets.append((
+            config["input_ranking_file"],
+            config["output_general_file"],
+            config["output_detailed_file"]
+        ))
+    return targets
+
 def normalize_region(region):
-    REGION_MAPPING = {
-        "Москва": "Москва",
-        "Московская область": "Москва",
-        "Калининград": "Калининград",
-        "Калининградская область": "Калининград"
-    }
     return REGION_MAPPING.get(region, region)
 
-def load_data(config):
-    df = pd.read_csv(config["input_ranking_file"])
-    df['BirthYear'] = pd.to_numeric(df['Birthday'], errors='coerce')
+def load_data(ranking_file):
+    df = pd.read_csv(ranking_file)
+    birth_column = next((c for c in BIRTH_YEAR_COLUMNS if c in df.columns), None)
+    df['BirthYear'] = pd.to_numeric(df[birth_column], errors='coerce') if birth_column else float('nan')
     return df
 
-def get_active_athletes(df, years):
-    athletes = {}
-    for year in years:
-        active = df[df[str(year)] > 0]
-        athletes[year] = {
-            'names': set(active['Name']),
-            'birth_years': active.set_index('Name')['BirthYear'].to_dict()
-        }
-    return athletes
-
-def calculate_general_stats(athletes, years):
+def data_years(df):
+    """Годы рейтинга - столбцы CSV, названные числом"""
+    return sorted(int(column) for column in df.columns if str(column).isdigit())
+
+def add_first_year(df, years):
+    """Добавляет столбец FirstYear - первый год с очками (NaN, если очков нет)"""
+    active = df[[str(year) for year in years]].gt(0).to_numpy()
+    first = pd.Series(years, dtype='float64').to_numpy()[active.argmax(axis=1)]
+    first[~active.any(axis=1)] = float('nan')
+    df = df.copy()
+    df['FirstYear'] = first
+    return df
+
+def calculate_general_stats(df, years):
+    """Участники, новые участники, их доля и средний возраст новых по годам.
+
+    В первом году данных новыми никто не считается, а средний возраст
+    считается по всем участникам.
+    """
+    if not years:
+        return []
+    first_year = years[0]
+    known_birth = df['BirthYear'] > 1900
+
     stats = []
-    prev_athletes = set()
-
-    for year in sorted(years):
-        current = athletes[year]
-        current_athletes = current['names']
-        new_athletes = current_athletes - prev_athletes
-
-        total = len(current_athletes)
-        new_count = len(new_athletes)
-
-        # Расчет среднего возраста
-        ages = []
-        for name in new_athletes:
-            birth_year = current['birth_years'].get(name)
-            if not pd.isna(birth_year) and birth_year > 1900:
-                ages.append(year - int(birth_year))
-
-        avg_age = round(sum(ages)/len(ages), 1) if ages else 0
-
-        # Для 2017 считаем всех участников новыми для расчета возраста
-        if year == 2017:
-            ages_all = [year - int(y) for y in current['birth_years'].values()
-                       if not pd.isna(y) and y > 1900]
-            avg_age = round(sum(ages_all)/len(ages_all), 1) if ages_all else 0
+    for year in years:
+        active = df[str(year)] > 0
+        total = int(active.sum())
+        new = active & (df['FirstYear'] == year)
+        new_count = int(new.sum())
+
+        aged = (active if year == first_year else new) & known_birth
+        ages = year - df.loc[aged, 'BirthYear'].astype(int)
+        avg_age = round(int(ages.sum()) / len(ages), 1) if len(ages) else 0
+
+        if year == first_year:
             new_count = 0
 
         share = round(new_count / total * 100, 1) if total > 0 else 0.0
@@ -69,61 +96,42 @@ def calculate_general_stats(athletes, years):
             "Средний возраст": avg_age
         })
 
-        prev_athletes.update(current_athletes)
-
     return stats
 
-def calculate_detailed_stats(df, athletes, years, stats):
-    region_data = defaultdict(lambda: defaultdict(int))
-    all_regions = defaultdict(int)
-
-    for year_stat in stats:
-        year = year_stat["Год"]
-        if year == 2017:
-            continue
-
-        current = athletes[year]
-        prev = set().union(*[athletes[y]['names'] for y in years if y < year])
-        new_athletes = current['names'] - prev
-
-        for name in new_athletes:
-            region = df[df['Name'] == name]['Region'].values[0]
-            norm_region = normalize_region(region)
-            region_data[year][norm_region] += 1
-            all_regions[norm_region] += 1
-
-    # Сортировка регионов
-    sorted_regions = sorted(all_regions.keys(),
-                          key=lambda x: -all_regions[x])
-
-    # Формирование таблицы
-    rows = []
-    for year in years + ['All']:
-        row = {'Год': year}
-        if year == 'All':
-            for region in sorted_regions:
-                row[region] = all_regions[region]
-        else:
-            for region in sorted_regions:
-                row[region] = region_data.get(year, {}).get(region, 0)
-        rows.append(row)
-
-    return pd.DataFrame(rows)
+def calculate_detailed_stats(df, years):
+    """Новые участники по регионам и годам одной сводной таблицей"""
+    new = df[df['FirstYear'].isin(years[1:])]
+    new = new.assign(Region=new['Region'].map(normalize_region), FirstYear=new['FirstYear'].astype(int))
 
-def main():
-    config = load_config()
-    df = load_data(config)
-    years = [2017, 2018, 2019, 2021, 2022, 2023, 2024]
+    counts = pd.crosstab(new['FirstYear'], new['Region'])
+    totals = counts.sum()
+    first_seen = new.sort_values('FirstYear', kind='stable')['Region'].drop_duplicates()
+    regions = sorted(first_seen, key=lambda r: -totals[r])
 
-    athletes = get_active_athletes(df, years)
-    general_stats = calculate_general_stats(athletes, years)
+    table = counts.reindex(index=years, columns=regions, fill_value=0)
+    table = pd.concat([table, totals.reindex(regions).to_frame('All').T])
+    table.index.name = 'Год'
+    return table.reset_index()
 
-    # Сохранение общей статистики
-    pd.DataFrame(general_stats).to_csv(config["output_general_file"], index=False)
+def build_trends(ranking_file, general_file, detailed_file):
+    df = load_data(ranking_file)
+    years = data_years(df)
+    df = add_first_year(df, years)
+
+    for path in (general_file, detailed_file):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+    pd.DataFrame(calculate_general_stats(df, years)).to_csv(general_file, index=False)
+    calculate_detailed_stats(df, years).to_csv(detailed_file, index=False)
+
+def main():
+    parser = argparse.ArgumentParser(description='Статистика притока новых участников по рейтингам')
+    parser.add_argument('--config', default='config.yaml', help='Конфигурационный файл с разделом trends')
+    args = parser.parse_args()
 
-    # Детальная статистика
-    detailed_df = calculate_detailed_stats(df, athletes, years, general_stats)
-    detailed_df.to_csv(config["output_detailed_file"], index=False)
+    for ranking_file, general_file, detailed_file in trend_targets(load_config(args.config)):
+        build_trends(ranking_file, general_file, detailed_file)
+        print(f"{ranking_file},{general_file},{detailed_file}")
 
 if __name__ == "__main__":
     main()
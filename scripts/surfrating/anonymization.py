@@ -1,43 +1,81 @@
 import hashlib
-from typing import Dict, Any
+import hmac
+import os
+from typing import Dict, Any, Optional
+from helpers import generate_athlete_id
 
-def anonymize_athlete_data(athlete: Dict[str, Any]) -> Dict[str, Any]:
-    """Анонимизирует данные спортсмена, заменяя имя на хэш и удаляя день рождения"""
+def pseudonym_hash(name: str, birth_year: Any, key: Optional[bytes] = None) -> str:
+    """Хэш спортсмена по фамилии, имени и году рождения.
 
-    name_parts = athlete['name'].split()
+    С ключом считается HMAC-SHA256, и по известным ФИО и году рождения
+    подобрать хэш без ключа нельзя.
+    """
+    name_parts = name.split()
     first_name = name_parts[1] if len(name_parts) > 1 else ""
     last_name = name_parts[0] if name_parts else ""
-    birth_year = str(athlete.get('birth_year', ''))
 
     hash_input = f"{last_name}_{first_name}_{birth_year}".lower().encode('utf-8')
-    hash_value = hashlib.sha256(hash_input).hexdigest()[:12]
+    if key is not None:
+        return hmac.new(key, hash_input, hashlib.sha256).hexdigest()[:12]
+    return hashlib.sha256(hash_input).hexdigest()[:12]
 
-    anonymized = athlete.copy()
-    anonymized['name'] = f"athlete_{hash_value}"
+class Anonymizer:
+    """Замена спортсменов псевдонимами при записи выходных файлов.
 
-    # Удаляем чувствительные данные
-    if 'birth_year' in anonymized:
-        del anonymized['birth_year']
+    Псевдоним каждого спортсмена вычисляется один раз за запуск. Записи
+    обрабатываются по одной во время сериализации: имя заменяется на
+    псевдоним, год рождения удаляется; id спортсмена выводится из того же
+    хэша, чтобы ссылки между файлами сохранялись. Выключенный анонимизатор
+    возвращает записи без изменений.
+    """
 
-    return anonymized
+    def __init__(self, enabled: bool, key: Optional[bytes] = None):
+        self.enabled = enabled
+        self.key = key
+        self._hashes = {}
 
-def apply_anonymization(data: Dict[str, Any], config: Dict) -> Dict[str, Any]:
-    """Применяет анонимизацию ко всем спортсменам в данных, если включено в конфиге"""
-    if not config.get('anonymization', {}).get('enabled', False):
-        return data
+    def _hash(self, name: str, birth_year: Any) -> str:
+        cache_key = (name, birth_year)
+        value = self._hashes.get(cache_key)
+        if value is None:
+            value = self._hashes[cache_key] = pseudonym_hash(name, birth_year, self.key)
+        return value
 
-    if 'overall_ranking' in data:
-        data['overall_ranking'] = [
-            anonymize_athlete_data(athlete)
-            for athlete in data['overall_ranking']
-        ]
+    def pseudonym(self, name: str, birth_year: Any) -> str:
+        if not self.enabled:
+            return name
+        return f"athlete_{self._hash(name, birth_year)}"
 
-    if 'year_rankings' in data:
-        for year, year_data in data['year_rankings'].items():
-            if 'athletes' in year_data:
-                year_data['athletes'] = [
-                    anonymize_athlete_data(athlete)
-                    for athlete in year_data['athletes']
-                ]
+    def athlete_id(self, name: str, birth_year: Any) -> str:
+        if not self.enabled:
+            return generate_athlete_id(name, birth_year)
+        return self._hash(name, birth_year)[:8]
 
-    return data
+    def __call__(self, athlete: Dict[str, Any]) -> Dict[str, Any]:
+        if not self.enabled or 'name' not in athlete:
+            return athlete
+
+        anonymized = athlete.copy()
+        anonymized['name'] = self.pseudonym(athlete['name'], athlete.get('birth_year', ''))
+        # Удаляем чувствительные данные
+        anonymized.pop('birth_year', None)
+        return anonymized
+
+def _salt(settings: Dict) -> Optional[bytes]:
+    """Ключ HMAC: anonymization.salt или переменная окружения из anonymization.salt_env"""
+    if settings.get('salt_env'):
+        value = os.environ.get(settings['salt_env'])
+        if not value:
+            raise ValueError(f"Не задана переменная окружения {settings['salt_env']} с ключом анонимизации")
+        return value.encode('utf-8')
+    if settings.get('salt'):
+        return str(settings['salt']).encode('utf-8')
+    return None
+
+def get_anonymizer(config: Dict) -> Anonymizer:
+    """Анонимизатор запуска; создается один раз и хранится в конфиге"""
+    if 'anonymizer' not in config:
+        settings = config.get('anonymization', {})
+        enabled = settings.get('enabled', False)
+        config['anonymizer'] = Anonymizer(enabled, _salt(settings) if enabled else None)
+    return config['anonymizer']
@@ -0,0 +1,200 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+import yaml
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config_loader import load_config, _read_config_file
+from data_parser import parse_files
+from calculations import process_athletes
+from output import save_ranking_json
+from synthetic_data import generate_dataset
+from wildcard import filter_athletes, candidates_from_results
+from analysis import add_first_year, calculate_detailed_stats
+
+DEFAULT_CONFIG = [
+    'conf/rfs/config.yaml',
+    'conf/base/scoring/default.yaml',
+    'conf/base/scoring/wsl/scoring-wsl-cs.yaml',
+    'conf/base/decay/decay-disabled.yaml',
+    'conf/base/years/all.yaml',
+    'conf/rfs/events.yaml'
+]
+
+STAGES = [
+    'load_config',
+    'parse_files',
+    'process_athletes',
+    'save_ranking_json',
+    'filter_athletes',
+    'calculate_detailed_stats'
+]
+
+def _measure(fn: Callable, memory: bool) -> Tuple[object, float, float]:
+    """Возвращает результат, время выполнения (с) и пиковую память (МБ).
+
+    Память считается отдельным повторным запуском под tracemalloc, чтобы
+    трассировка не искажала время.
+    """
+    start = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - start
+
+    peak_mb = None
+    if memory:
+        tracemalloc.start()
+        try:
+            fn()
+            peak_mb = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        finally:
+            tracemalloc.stop()
+    return result, seconds, peak_mb
+
+def _write_overlay(workdir: Path, files: List[str], years: List[int]) -> str:
+    """Пишет конфиг поверх базового: синтетические входы, все годы, без кэша"""
+    overlay = {
+        'current_year': max(years),
+        'allowed_years': years,
+        'input_paths': [str(Path(files[0]).parent / 'synthetic_*.csv')],
+        'cache': {'enabled': False},
+        'output': {
+            'filename': str(workdir / 'ranking.csv'),
+            'ranking_json': str(workdir / 'ranking.json')
+        }
+    }
+    path = workdir / 'benchmark.yaml'
+    with open(path, 'w', encoding='utf-8') as f:
+        yaml.safe_dump(overlay, f, allow_unicode=True)
+    return str(path)
+
+def _trends_frame(results: List[Dict], years: List[int]):
+    """Строит таблицу в формате analysis.load_data"""
+    import pandas as pd
+
+    df = pd.DataFrame([
+        {
+            'Name': athlete['name'],
+            'Region': athlete['region'],
+            'BirthYear': athlete['birth_year'] or None,
+            **{str(year): athlete['years'].get(year, {}).get('year_total_points', 0) for year in years}
+        }
+        for athlete in results
+    ])
+    return add_first_year(df, years)
+
+def run_size(rows: int, config_paths: List[str], workdir: Path, memory: bool = True, seed: int = 0) -> Dict:
+    """Прогоняет все этапы на синтетическом наборе из rows строк"""
+    files = generate_dataset(str(workdir / 'data'), rows, seed=seed)
+    years = sorted(int(Path(f).stem.rsplit('_', 1)[1]) for f in files)
+    paths = config_paths + [_write_overlay(workdir, files, years)]
+    metrics = {}
+
+    def stage(name: str, fn: Callable):
+        result, seconds, peak_mb = _measure(fn, memory)
+        metrics[name] = {'seconds': seconds, 'peak_mb': peak_mb}
+        return result
+
+    def cold_load_config():
+        _read_config_file.cache_clear()
+        return load_config(paths)
+
+    config = stage('load_config', cold_load_config)
+    table, event_store = stage('parse_files', lambda: parse_files(config))
+    results = stage('process_athletes', lambda: process_athletes(table, config))
+    for idx, athlete in enumerate(results, 1):
+        athlete['rank'] = idx
+    stage('save_ranking_json', lambda: save_ranking_json(results, config, event_store))
+
+    candidates = candidates_from_results(results)
+    stage('filter_athletes', lambda: filter_athletes(candidates, config['current_year'], config['wildcard']))
+
+    df = _trends_frame(results, years)
+    stage('calculate_detailed_stats', lambda: calculate_detailed_stats(df, years))
+
+    return metrics
+
+def compare(current: Dict, baseline: Dict, tolerance: float, noise: float = 0.05) -> bool:
+    """Печатает сравнение с базовой линией; возвращает False при регрессии"""
+    ok = True
+    print('Строк,Этап,Время (с),База (с),Изменение (%),Память (МБ),База (МБ),Статус')
+    for rows, stages in current.items():
+        for name in STAGES:
+            now = stages.get(name)
+            base = baseline.get(rows, {}).get(name)
+            if now is None:
+                continue
+            status = 'нет базы'
+            change = base_seconds = base_peak = '-'
+            if base:
+                base_seconds = f"{base['seconds']:.3f}"
+                base_peak = f"{base['peak_mb']:.1f}" if base.get('peak_mb') is not None else '-'
+                change = f"{(now['seconds'] / base['seconds'] - 1) * 100:+.1f}" if base['seconds'] else '-'
+                slower = now['seconds'] > base['seconds'] * (1 + tolerance) and now['seconds'] - base['seconds'] > noise
+                bigger = (now['peak_mb'] is not None and base.get('peak_mb') is not None
+                          and now['peak_mb'] > base['peak_mb'] * (1 + tolerance) and now['peak_mb'] - base['peak_mb'] > 1)
+                status = 'РЕГРЕССИЯ' if slower or bigger else 'OK'
+                ok = ok and not (slower or bigger)
+            peak = f"{now['peak_mb']:.1f}" if now['peak_mb'] is not None else '-'
+            print(f"{rows},{name},{now['seconds']:.3f},{base_seconds},{change},{peak},{base_peak},{status}")
+    return ok
+
+def load_baseline(path: str) -> Dict:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f).get('results', {})
+    except FileNotFoundError:
+        return {}
+
+def save_baseline(path: str, results: Dict) -> None:
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'results': results
+        }, f, ensure_ascii=False, indent=2)
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк конвейера рейтинга на синтетических данных')
+    parser.add_argument('--rows', nargs='+', type=int, default=[10000, 100000, 1000000],
+                        help='Размеры наборов данных (строк результатов)')
+    parser.add_argument('--config', nargs='+', default=DEFAULT_CONFIG, help='Список конфигурационных файлов')
+    parser.add_argument('--baseline', default='.cache/surfrating/benchmark_baseline.json',
+                        help='Файл базовой линии (замеры зависят от машины, поэтому по умолчанию в кэше)')
+    parser.add_argument('--save', action='store_true', help='Перезаписать базовую линию текущими результатами')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Допустимое ухудшение (доля)')
+    parser.add_argument('--no-memory', action='store_true', help='Не измерять пиковую память')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    try:
+        current = {}
+        for rows in args.rows:
+            with tempfile.TemporaryDirectory(prefix='surfrating-bench-') as tmp:
+                current[str(rows)] = run_size(rows, args.config, Path(tmp), not args.no_memory, args.seed)
+
+        baseline = load_baseline(args.baseline)
+        ok = compare(current, baseline, args.tolerance)
+
+        if args.save or not baseline:
+            save_baseline(args.baseline, {**baseline, **current})
+            print(f"Базовая линия сохранена: {args.baseline}")
+        elif not ok:
+            exit(1)
+    except Exception as e:
+        print(f"Ошибка: {str(e)}")
+        exit(1)
+
+if __name__ == '__main__':
+    main()
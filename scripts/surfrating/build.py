@@ -0,0 +1,111 @@
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from config_loader import load_config, _yaml_load
+from data_parser import parse_files, input_key
+from calculations import process_athletes
+from output import generate_output
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from indexer import generate_index
+
+def discover_targets(build_config: Dict, overrides: List[str] = ()) -> List[Tuple[str, List[str]]]:
+    """Находит конечные конфиги рейтингов и собирает для каждого цепочку конфигов"""
+    targets = []
+    for organizer in build_config['organizers'].values():
+        for pattern in organizer['targets']:
+            for leaf in sorted(glob.glob(pattern)):
+                targets.append((leaf, organizer['base'] + [leaf] + list(overrides)))
+    return targets
+
+def build_target(config: Dict, parsed: Optional[Tuple] = None) -> Tuple:
+    """Собирает один рейтинг: места, все представления и, если включена, историю мест.
+
+    parsed - результат parse_files для цели с тем же input_key (None - разобрать
+    заново); возвращается для следующих целей группы.
+    """
+    if parsed is None:
+        parsed = parse_files(config)
+    data, event_store = parsed
+    results = process_athletes(data, config)
+    generate_output(results, config, event_store, print_console=False)
+    if config.get('history', {}).get('enabled'):
+        from history import save_history
+        save_history(data, config, event_store)
+    return parsed
+
+def build_group(targets: List[Tuple[str, Any]], load: Callable[[Any], Dict] = load_config) -> List[Dict]:
+    """Собирает рейтинги с одинаковыми входными данными, разбирая файлы один раз.
+
+    targets - пары (имя цели, аргумент load); load возвращает конфиг цели.
+    """
+    reports = []
+    parsed = None
+    for name, source in targets:
+        start = time.perf_counter()
+        error = None
+        try:
+            parsed = build_target(load(source), parsed)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        reports.append({'target': name, 'seconds': time.perf_counter() - start, 'error': error})
+    return reports
+
+def report_targets(reports: List[Dict], index_root: str) -> bool:
+    """Печатает строки отчета по целям и обновляет индекс, если ошибок нет; True - без ошибок"""
+    for report in sorted(reports, key=lambda r: r['target']):
+        status = 'OK' if report['error'] is None else f"Ошибка: {report['error']}"
+        print(f"{report['target']},{report['seconds']:.3f},{status}")
+
+    failed = [r for r in reports if r['error'] is not None]
+    if failed:
+        print(f"Не собрано целей: {len(failed)} из {len(reports)}, индекс не обновлен")
+        return False
+    generate_index(index_root)
+    return True
+
+def _group_targets(targets: List[Tuple[str, List[str]]]) -> Tuple[List[List[Tuple[str, List[str]]]], List[Dict]]:
+    groups = {}
+    failed = []
+    for name, config_paths in targets:
+        try:
+            key = input_key(load_config(config_paths))
+        except Exception as e:
+            failed.append({'target': name, 'seconds': 0.0, 'error': f"{type(e).__name__}: {e}"})
+            continue
+        groups.setdefault(key, []).append((name, config_paths))
+    return list(groups.values()), failed
+
+def build_all(build_config_path: str, workers: int = 0, overrides: List[str] = ()) -> bool:
+    """Собирает все рейтинги в пуле процессов и обновляет индекс рейтингов.
+
+    Возвращает True, если все цели собраны без ошибок; индекс обновляется
+    только в этом случае.
+    """
+    start = time.perf_counter()
+    with open(build_config_path, 'r', encoding='utf-8') as f:
+        build_config = _yaml_load(f)
+    targets = discover_targets(build_config, overrides)
+    groups, reports = _group_targets(targets)
+
+    max_workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=min(max_workers, max(len(groups), 1))) as pool:
+        futures = [(group, pool.submit(build_group, group)) for group in groups]
+        for group, future in futures:
+            try:
+                reports.extend(future.result())
+            except Exception as e:
+                reports.extend(
+                    {'target': name, 'seconds': 0.0, 'error': f"{type(e).__name__}: {e}"}
+                    for name, _ in group
+                )
+
+    print('Цель,Время (с),Статус')
+    if not report_targets(reports, build_config.get('index_root', 'output/rankings')):
+        return False
+    print(f"Собрано целей: {len(reports)} за {time.perf_counter() - start:.3f} с")
+    return True
@@ -1,149 +1,210 @@
+import numpy as np
 from typing import Dict, List
+from model import AthleteTable
 
-def calculate_base_points(place: str, group: str, config: Dict) -> int:
-    system = config['scoring'][config['scoring_system']]
-    coeff = config['event_groups'][group]['coefficient']
+DNS_PLACE_CODE = 0
 
-    if place == 'DNS':
-        return round(system.get('DNS', 0) * coeff)
+def compile_scoring_tables(config: Dict) -> None:
+    """Компилирует системы подсчета в таблицы место -> очки для каждой группы событий.
+
+    Столбец 0 хранит очки за DNS, столбцы 1..max_place - очки за места,
+    последний столбец - нулевые очки для мест вне таблицы.
+    """
+    groups = {
+        name: data.get('coefficient', 1.0)
+        for name, data in config['event_groups'].items()
+        if isinstance(data, dict)
+    }
+    coefficients = np.array(list(groups.values()), dtype=float)
+    tables = {}
+
+    for system_name, system in config.get('scoring', {}).items():
+        bounds = [k[1] if isinstance(k, tuple) else k for k in system if isinstance(k, (int, tuple))]
+        max_place = max(bounds, default=0)
+        base = np.zeros(max_place + 2)
+        base[DNS_PLACE_CODE] = system.get('DNS', 0)
+
+        # Обходим ключи в обратном порядке, чтобы при пересечении диапазонов
+        # побеждал первый подходящий ключ, как при последовательном поиске
+        for k, v in reversed(list(system.items())):
+            if isinstance(k, tuple):
+                base[max(k[0], 1):k[1] + 1] = v
+            elif isinstance(k, int) and k >= 1:
+                base[k] = v
+
+        tables[system_name] = {
+            'groups': {name: idx for idx, name in enumerate(groups)},
+            'max_place': max_place,
+            'base': base,
+            'points': np.rint(coefficients[:, None] * base[None, :]).astype(np.int64)
+        }
 
+    config['scoring_tables'] = tables
+
+def encode_place(place: str, max_place: int) -> int:
+    if place == 'DNS':
+        return DNS_PLACE_CODE
     try:
         place_num = int(place)
     except ValueError:
-        return 0
+        return max_place + 1
+    return place_num if 1 <= place_num <= max_place else max_place + 1
 
-    for k, v in system.items():
-        if isinstance(k, tuple) and k[0] <= place_num <= k[1]:
-            return round(v * coeff)
-        elif place_num == k:
-            return round(v * coeff)
-    return 0
+def calculate_base_points(place_codes: np.ndarray, group_codes: np.ndarray, table: AthleteTable, config: Dict) -> np.ndarray:
+    scoring = config['scoring_tables'][config['scoring_system']]
+    place_lut = np.array([encode_place(p, scoring['max_place']) for p in table.places.values], dtype=np.intp)
+    group_lut = np.array([scoring['groups'][g] for g in table.groups.values], dtype=np.intp)
+    return scoring['points'][group_lut[group_codes], place_lut[place_codes]]
 
-def apply_participant_factor(points: int, participants_count: int, config: Dict) -> int:
+def apply_participant_factor(points: np.ndarray, participants_counts: np.ndarray, config: Dict) -> np.ndarray:
     if not config['bonuses']['participant_factor']['enabled']:
         return points
 
-    rules = config['bonuses']['participant_factor']['rules']
-    for rule in rules:
+    factors = np.ones(len(points))
+    matched = np.zeros(len(points), dtype=bool)
+    for rule in config['bonuses']['participant_factor']['rules']:
         min_p = rule['min']
         max_p = rule['max'] if rule['max'] != "inf" else float('inf')
-        if min_p <= participants_count <= max_p:
-            return round(points * rule['factor'])
-    return points
+        mask = ~matched & (participants_counts >= min_p) & (participants_counts <= max_p)
+        factors[mask] = rule['factor']
+        matched |= mask
+    return np.rint(points * factors).astype(np.int64)
 
-def apply_decay(points: int, year: int, config: Dict) -> int:
-    if config['bonuses']['decay']['enabled']:
-        decay = config['bonuses']['decay']['factor'] ** (config['current_year'] - year)
-        return round(points * decay)
-    return points
+def apply_decay(points: np.ndarray, years: np.ndarray, config: Dict) -> np.ndarray:
+    if not config['bonuses']['decay']['enabled']:
+        return points
+
+    unique_years, inverse = np.unique(years, return_inverse=True)
+    decay = np.array([
+        config['bonuses']['decay']['factor'] ** (config['current_year'] - int(year))
+        for year in unique_years
+    ])
+    return np.rint(points * decay[inverse]).astype(np.int64)
 
-def apply_participation_bonus(points: int, is_dns: bool, config: Dict) -> int:
-    if not is_dns and config['bonuses']['participation']['enabled']:
-        return points + config['bonuses']['participation']['points']
+def apply_participation_bonus(points: np.ndarray, is_dns: np.ndarray, config: Dict) -> np.ndarray:
+    if config['bonuses']['participation']['enabled']:
+        return points + np.where(is_dns, 0, config['bonuses']['participation']['points'])
     return points
 
-def apply_sport_rank_bonus(total: int, sport_rank: str, config: Dict) -> int:
+def apply_sport_rank_bonus(totals: np.ndarray, sport_rank_codes: np.ndarray, sport_rank_values: List[str], config: Dict) -> np.ndarray:
     if config['bonuses']['sport_rank']['enabled']:
-        return total + config['bonuses']['sport_rank']['values'].get(rank, 0)
-    return total
-
-def process_year_points(year: int, event_data: Dict, config: Dict) -> Dict:
-    year_info = {
-        'year_total_points': 0,
-        'events': []
-    }
+        values = config['bonuses']['sport_rank']['values']
+        bonus = np.array([values.get(rank, 0) for rank in sport_rank_values], dtype=np.int64)
+        return totals + bonus[sport_rank_codes]
+    return totals
+
+def score_results(table: AthleteTable, mask: np.ndarray, config: Dict) -> np.ndarray:
+    """Считает очки за все отобранные результаты одним векторным проходом"""
+    place_codes = table.place[mask]
+    is_dns = np.array([p == 'DNS' for p in table.places.values], dtype=bool)[place_codes]
+
+    points = calculate_base_points(place_codes, table.group[mask], table, config)
+    points = apply_participant_factor(points, table.participants_count[mask], config)
+    points = apply_decay(points, table.year[mask], config)
+    points = apply_participation_bonus(points, is_dns, config)
+    return points
 
-    for event_name, event_info in event_data.items():
-        place = event_info['place']
-        group = event_info['group']
-        participants_count = event_info.get('participants_count', 0)
-        is_dns = (place == 'DNS')
-
-        points = calculate_base_points(place, group, config)
-        points = apply_participant_factor(points, participants_count, config)
-        points = apply_decay(points, year, config)
-        points = apply_participation_bonus(points, is_dns, config)
-
-        year_info['year_total_points'] += points
-        year_info['events'].append({
-            'event_name': event_name,
-            'place': int(place) if place.isdigit() else place,
-            'points': points,
-            'group': group,
-            'participants_count': participants_count
-        })
-
-    return year_info
-
-def process_athletes(data: Dict, config: Dict) -> List[Dict]:
+def _best_results(athlete: np.ndarray, years: np.ndarray, place_num: np.ndarray, points: np.ndarray, n_athletes: int) -> np.ndarray:
+    """Индекс лучшего результата каждого спортсмена (-1, если результатов нет).
+
+    Среди числовых мест выбирается лучшее место, затем более поздний год, затем
+    больше очков; если числовых мест нет - результат с наибольшими очками.
+    """
+    is_num = place_num >= 0
+    has_num = np.bincount(athlete, weights=is_num, minlength=n_athletes) > 0
+    candidates = np.flatnonzero(is_num | ~has_num[athlete])
+
+    order = candidates[np.lexsort((
+        candidates,
+        np.where(is_num, -points, 0)[candidates],
+        np.where(is_num, -years, 0)[candidates],
+        np.where(is_num, place_num, -points)[candidates],
+        athlete[candidates]
+    ))]
+    first = np.r_[True, athlete[order][1:] != athlete[order][:-1]] if len(order) else np.empty(0, dtype=bool)
+
+    best = np.full(n_athletes, -1, dtype=np.int64)
+    best[athlete[order][first]] = order[first]
+    return best
+
+def process_athletes(table: AthleteTable, config: Dict) -> List[Dict]:
     allowed_years = config.get('allowed_years')
-    results = []
+    if allowed_years:
+        mask = np.isin(table.year, list(allowed_years))
+    else:
+        mask = np.ones(len(table.year), dtype=bool)
 
-    for name, info in data.items():
-        filtered_years = {}
-        if allowed_years:
-            for year, year_events in info['years'].items():
-                if int(year) in allowed_years:
-                    filtered_years[year] = year_events
-        else:
-            filtered_years = info['years']
+    n_athletes = len(table)
+    athlete = table.athlete[mask]
+    years = table.year[mask].astype(np.int64)
+    places = table.place[mask]
+    points = score_results(table, mask, config)
 
-        last_year = max(map(int, filtered_years.keys())) if filtered_years else 0
+    place_lut = np.array([int(p) if p.isdigit() else -1 for p in table.places.values], dtype=np.int64)
+    place_num = place_lut[places]
 
-        entry = {
-            'name': name,
-            'birth_year': info['birth_year'],
-            'region': info['region'],
-            'category': info['category'],
-            'sport_rank': info['sport_rank'],
-            'last_year': last_year,
-            'years': {},
-            'total_points': 0,
-            'best_result': None
-        }
-
-        all_events = []
-        total_points = 0
+    total_points = np.bincount(athlete, weights=points, minlength=n_athletes).astype(np.int64)
+    total_points = apply_sport_rank_bonus(total_points, table.sport_rank, table.sport_ranks.values, config)
 
-        for year, year_events in filtered_years.items():
-            year_info = process_year_points(int(year), year_events, config)
-            entry['years'][int(year)] = year_info
-            total_points += year_info['year_total_points']
+    last_year = np.zeros(n_athletes, dtype=np.int64)
+    np.maximum.at(last_year, athlete, years)
 
-            for event in year_info['events']:
-                all_events.append({
-                    **event,
-                    'event_year': int(year)
-                })
+    best = _best_results(athlete, years, place_num, points, n_athletes)
+    has_best = best >= 0
+    # Индекс -1 указывает на добавленный в конец элемент-заглушку
+    best_place = np.r_[place_num, -1][best]
+    best_place = np.where(best_place >= 0, best_place, 9999)
+    best_year = np.r_[years, 0][best]
 
-        if all_events:
-            numeric_events = [e for e in all_events if isinstance(e['place'], int)]
+    if config['sorting']['enabled']:
+        order = np.lexsort((-best_year, -last_year, best_place, -total_points))
+    else:
+        order = np.argsort(-total_points, kind='stable')
+
+    starts = np.searchsorted(athlete, np.arange(n_athletes)).tolist()
+    ends = np.searchsorted(athlete, np.arange(n_athletes), side='right').tolist()
+    years_list = years.tolist()
+    points_list = points.tolist()
+    events_list = table.event[mask].tolist()
+    places_list = places.tolist()
+    groups_list = table.group[mask].tolist()
+    counts_list = table.participants_count[mask].tolist()
 
-            if numeric_events:
-                best_event = min(
-                    numeric_events,
-                    key=lambda x: (x['place'], -x['event_year'], -x['points'])
-                )
-            else:
-                best_event = max(all_events, key=lambda x: x['points'])
+    results = []
+    for idx in order.tolist():
+        entry = {
+            **table.athlete_info(idx),
+            'last_year': int(last_year[idx]),
+            'years': {},
+            'total_points': int(total_points[idx]),
+            'best_result': None
+        }
 
+        for i in range(starts[idx], ends[idx]):
+            year_info = entry['years'].setdefault(years_list[i], {
+                'year_total_points': 0,
+                'events': []
+            })
+            place = table.places[places_list[i]]
+            year_info['year_total_points'] += points_list[i]
+            year_info['events'].append({
+                'event_name': table.events[events_list[i]],
+                'place': int(place) if place.isdigit() else place,
+                'points': points_list[i],
+                'group': table.groups[groups_list[i]],
+                'participants_count': counts_list[i]
+            })
+
+        if has_best[idx]:
+            i = int(best[idx])
+            place = table.places[places_list[i]]
             entry['best_result'] = {
-                'event_name': best_event['event_name'],
-                'event_year': str(best_event['event_year']),
-                'place': best_event['place'],
-                'points': best_event['points']
+                'event_name': table.events[events_list[i]],
+                'event_year': str(years_list[i]),
+                'place': int(place) if place.isdigit() else place,
+                'points': points_list[i]
             }
 
-        total_points = apply_sport_rank_bonus(total_points, entry['sport_rank'], config)
-        entry['total_points'] = total_points
         results.append(entry)
 
-    if config['sorting']['enabled']:
-        return sorted(results, key=lambda x: (
-            -x['total_points'],
-            x['best_result']['place'] if x['best_result'] and isinstance(x['best_result']['place'], int) else 9999,
-            -x['last_year'],
-            # Добавляем дополнительный ключ для стабильной сортировки
-            -int(x['best_result']['event_year']) if x['best_result'] and x['best_result'].get('event_year') else 0
-        ))
-    return sorted(results, key=lambda x: -x['total_points'])
+    return results
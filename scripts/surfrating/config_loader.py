@@ -1,5 +1,16 @@
-import yaml
-from typing import Dict
+import copy
+import hashlib
+import os
+import pickle
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional
+from helpers import EventGroupMatcher
+from identity import load_aliases
+from parse_cache import file_digest
+
+COMPILED_CACHE_VERSION = 1
+COMPILED_CACHE_DIR = '.cache/surfrating/config'
 
 def deep_merge(source: Dict, overrides: Dict) -> Dict:
     merged = source.copy()
@@ -23,19 +34,116 @@ def process_event_groups(config: Dict) -> None:
     event_groups = config.get('event_groups', {})
     event_groups.setdefault('default', {'coefficient': 1.0, 'events': []})
     config['event_groups'] = event_groups
+    config['event_group_matcher'] = EventGroupMatcher(event_groups)
     config.setdefault('allowed_events', [])
 
-def load_config(config_paths: list) -> Dict:
+def process_identity(config: Dict) -> None:
+    identity = config.get('identity', {})
+    config['athlete_aliases'] = load_aliases(identity.get('aliases')) if identity.get('enabled') else {}
+
+def _yaml_load(stream):
+    """yaml.safe_load через libyaml (CSafeLoader), если PyYAML собран с ней"""
+    import yaml
+    return yaml.load(stream, Loader=getattr(yaml, 'CSafeLoader', yaml.SafeLoader))
+
+@lru_cache(maxsize=None)
+def _read_config_file(path: str) -> Dict:
+    with open(path, 'r', encoding='utf-8') as f:
+        return _yaml_load(f) or {}
+
+def parse_override(spec: str) -> Dict:
+    """Превращает строку вида 'bonuses.decay.factor=0.5' во вложенный словарь"""
+    key_path, value = spec.split('=', 1)
+    override = _yaml_load(value)
+    for key in reversed(key_path.split('.')):
+        override = {key: override}
+    return override
+
+def _is_override(path: str) -> bool:
+    return '=' in path and not os.path.exists(path)
+
+def _compile_config(config_paths: List[str]) -> Dict:
+    from calculations import compile_scoring_tables
+
     config = {}
     for path in config_paths:
-        with open(path, 'r', encoding='utf-8') as f:
-            current_config = yaml.safe_load(f) or {}
-            config = deep_merge(config, current_config)
+        if _is_override(path):
+            current_config = parse_override(path)
+        else:
+            current_config = copy.deepcopy(_read_config_file(path))
+        config = deep_merge(config, current_config)
 
     process_scoring_systems(config)
     process_event_groups(config)
+    process_identity(config)
+    compile_scoring_tables(config)
 
     if 'allowed_years' in config:
         config['allowed_years'] = set(config['allowed_years'])
 
     return config
+
+def _dependencies(config_paths: List[str], config: Dict) -> List[str]:
+    """Файлы, от содержимого которых зависит собранная конфигурация"""
+    files = [path for path in config_paths if not _is_override(path)]
+    identity = config.get('identity', {})
+    if identity.get('enabled') and identity.get('aliases'):
+        files.append(identity['aliases'])
+    return files
+
+def _digest(path: str) -> Optional[str]:
+    return file_digest(path) if os.path.exists(path) else None
+
+def _compiled_cache_path(config_paths: List[str]) -> Path:
+    key = hashlib.md5(repr(list(config_paths)).encode('utf-8')).hexdigest()
+    return Path(COMPILED_CACHE_DIR) / f"{key}.pkl"
+
+def _uses_cache(config: Dict) -> bool:
+    cache_config = config.get('cache', {})
+    return cache_config.get('enabled', True) and not cache_config.get('rebuild')
+
+def _load_compiled(config_paths: List[str]) -> Optional[Dict]:
+    try:
+        with open(_compiled_cache_path(config_paths), 'rb') as f:
+            entry = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+    if entry.get('version') != COMPILED_CACHE_VERSION or entry['paths'] != list(config_paths):
+        return None
+    if any(_digest(path) != digest for path, digest in entry['digests'].items()):
+        return None
+    return entry['config'] if _uses_cache(entry['config']) else None
+
+def _store_compiled(config_paths: List[str], config: Dict) -> None:
+    cache_file = _compiled_cache_path(config_paths)
+    entry = {
+        'version': COMPILED_CACHE_VERSION,
+        'paths': list(config_paths),
+        'digests': {path: _digest(path) for path in _dependencies(config_paths, config)},
+        'config': config
+    }
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = cache_file.with_suffix(f'.{os.getpid()}.tmp')
+        with open(tmp_file, 'wb') as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, cache_file)
+    except OSError:
+        pass
+
+def load_config(config_paths: list) -> Dict:
+    """Собирает конфигурацию из файлов и переопределений key=value.
+
+    Собранная конфигурация сохраняется в COMPILED_CACHE_DIR и используется
+    повторно, пока не изменился список путей и содержимое файлов (включая
+    таблицу псевдонимов); cache.enabled=false и cache.rebuild=true
+    отключают этот кэш так же, как кэш разбора.
+    """
+    config = _load_compiled(config_paths)
+    if config is not None:
+        return config
+
+    config = _compile_config(config_paths)
+    if _uses_cache(config):
+        _store_compiled(config_paths, config)
+    return config
@@ -1,106 +1,136 @@
-import csv
 import glob
-import re
-import pandas as pd
-from collections import defaultdict
-from typing import Dict
+from collections import Counter, namedtuple
+from typing import Dict, List, Tuple
 from helpers import read_csv_file, extract_year, get_event_group, generate_event_id
+from identity import resolve_name
+from parse_cache import cached_parse
+from event_store import EventStore
+from model import AthleteTable
 
-def _process_row(row: dict, athletes: dict, config: Dict, event_participants: dict, events_info: dict) -> None:
+ParsedRow = namedtuple('ParsedRow', [
+    'event_id',
+    'event_name',
+    'event_year',
+    'event_date',
+    'discipline',
+    'category',
+    'place',
+    'athlete_name',
+    'region',
+    'sport_rank',
+    'birth_year'
+])
+
+REQUIRED_COLUMNS = [
+    'Год',
+    'Дата',
+    'Событие',
+    'ФИО',
+    'Год рождения',
+    'Регион',
+    'Разряд',
+    'Место'
+]
+
+parse_stats = Counter()
+
+def _parse_row(row: dict) -> list:
+    """Разбирает строку CSV в не зависящий от конфигурации список полей"""
     event_name       = row['Событие'].strip()
-    event_year       = int(row['Год'])
     event_date       = row['Дата'].strip()
     event_discipline = row['Дисциплина'].strip()
     event_category   = row['Категория'].strip()
-    event_group      = get_event_group(event_name, config)
-    event_id         = generate_event_id(event_name, event_date, event_discipline, event_category)
-
-    if event_id not in events_info:
-        events_info[event_id] = {
-            'name': event_name,
-            'year': event_year,
-            'discipline': event_discipline,
-            'category': event_category,
-            'group': event_group,
-            'participants_count': 0
-        }
+
+    return [
+        generate_event_id(event_name, event_date, event_discipline, event_category),
+        event_name,
+        int(row['Год']),
+        event_date,
+        event_discipline,
+        event_category,
+        row['Место'].strip().upper(),
+        ' '.join(row['ФИО'].split()[:2]),
+        row['Регион'].strip(),
+        row['Разряд'].strip(),
+        extract_year(row['Год рождения'])
+    ]
+
+def _parse_file(file_path: str) -> list:
+    return [_parse_row(row) for row in read_csv_file(file_path, REQUIRED_COLUMNS)]
+
+def _process_row(row: ParsedRow, athletes, config: Dict, event_store: EventStore) -> None:
+    event_group = get_event_group(row.event_name, config)
+
+    event_store.add_event(row.event_id, {
+        'name': row.event_name,
+        'year': row.event_year,
+        'date': row.event_date,
+        'discipline': row.discipline,
+        'category': row.category,
+        'group': event_group,
+        'participants_count': 0
+    })
 
     if config.get('allowed_events') and event_group not in config['allowed_events']:
+        parse_stats['rows_skipped_events'] += 1
         return
 
-    place              = row['Место'].strip().upper()
-    athlete_name       = ' '.join(row['ФИО'].split()[:2])
-    athlete_region     = row['Регион'].strip()
-    athlete_sport_rank = row['Разряд'].strip()
-    athlete_birth_year = extract_year(row['Год рождения'])
-
-    if place != 'DNS':
-        event_key = (event_year, event_name)
-        event_participants[event_key].add(athlete_name)
-
-    athlete = athletes[athlete_name]
-    athlete['years'][event_year][event_name] = {
-        'place': place,
-        'group': event_group
-    }
-    athlete['regions'][event_year]     = athlete_region
-    athlete['sport_ranks'][event_year] = athlete_sport_rank
-    athlete['birth_year']              = athlete_birth_year
-    athlete['category']                = event_category
-    athlete['last_year']               = max(athlete['last_year'], event_year)
-
-def _finalize_athletes_data(athletes: dict) -> None:
-    for athlete in athletes.values():
-        athlete['region'] = max(athlete['regions'].items(), key=lambda x: x[0])[1] if athlete['regions'] else ''
-        athlete['sport_rank'] = max(athlete['sport_ranks'].items(), key=lambda x: x[0])[1] if athlete['sport_ranks'] else ''
-
-def parse_files(config: Dict) -> Dict[str, Dict]:
-    events_info = {}
-    event_participants = defaultdict(set)
-
-    athletes = defaultdict(lambda: {
-        'years': defaultdict(dict),
-        'category': '',
-        'birth_year': 0,
-        'regions': defaultdict(str),
-        'sport_ranks': defaultdict(str),
-        'last_year': 0
-    })
+    athlete_name = resolve_name(config.get('athlete_aliases') or {}, row.athlete_name, row.birth_year)
+    event_store.add_result(row.event_id, athlete_name, row.place)
 
-    required_columns = [
-        'Год',
-        'Дата',
-        'Событие',
-        'ФИО',
-        'Год рождения',
-        'Регион',
-        'Разряд',
-        'Место'
-    ]
+    athletes.add_result(
+        athlete_name,
+        row.event_year,
+        row.event_name,
+        row.place,
+        event_group,
+        row.region,
+        row.sport_rank,
+        row.birth_year,
+        row.category
+    )
+
+def input_key(config: Dict) -> str:
+    """Ключ входных данных: конфиги с одинаковым ключом дают одинаковый результат parse_files"""
+    return repr((
+        config['input_paths'],
+        config.get('input_db'),
+        config['event_groups'],
+        config['allowed_events'],
+        sorted(config.get('athlete_aliases', {}).items())
+    ))
+
+def input_files(config: Dict) -> List[str]:
+    """Входные файлы в порядке шаблонов, внутри шаблона - по имени"""
+    return [file_path for pattern in config['input_paths'] for file_path in sorted(glob.glob(pattern))]
+
+def load_file(file_path: str, athletes, config: Dict, event_store: EventStore) -> None:
+    """Добавляет строки файла в хранилища; athletes - AthleteTable или объект с тем же add_result"""
+    try:
+        rows = cached_parse(file_path, _parse_file, config)
+        parse_stats['files_read'] += 1
+        parse_stats['rows_parsed'] += len(rows)
+        for row in rows:
+            _process_row(ParsedRow(*row), athletes, config, event_store)
+    except ValueError as e:
+        print(f"Пропущен файл {file_path}: {str(e)}")
+        parse_stats['files_skipped'] += 1
+
+def parse_files(config: Dict) -> Tuple[AthleteTable, EventStore]:
+    event_store = EventStore()
+    athletes = AthleteTable()
+
+    if config.get('input_db', {}).get('enabled'):
+        from results_db import query_rows
+        rows = query_rows(config)
+        parse_stats['rows_parsed'] += len(rows)
+        for row in rows:
+            _process_row(ParsedRow(*row), athletes, config, event_store)
+    else:
+        for file_path in input_files(config):
+            load_file(file_path, athletes, config, event_store)
+
+    event_store.finalize()
+    athletes.finalize(event_store)
 
-    for pattern in config['input_paths']:
-        for file_path in glob.glob(pattern):
-            try:
-                rows = read_csv_file(file_path, required_columns)
-                for row in rows:
-                    _process_row(row, athletes, config, event_participants, events_info)
-            except ValueError as e:
-                print(f"Пропущен файл {file_path}: {str(e)}")
-                continue
-
-    for event_id, event_data in events_info.items():
-        participants = set()
-        for (year, name), names_set in event_participants.items():
-            if year == event_data['year'] and name == event_data['name']:
-                participants |= names_set
-        event_data['participants_count'] = len(participants)
-
-    for athlete in athletes.values():
-        for year, events_dict in athlete['years'].items():
-            for event_name, event_info in events_dict.items():
-                key = (year, event_name)
-                event_info['participants_count'] = len(event_participants.get(key, set()))
-
-    _finalize_athletes_data(athletes)
-
-    return athletes, events_info
+    return athletes, event_store
@@ -0,0 +1,54 @@
+from collections import defaultdict
+from typing import Dict, Iterator, Set, Tuple
+
+class EventStore:
+    """Хранилище событий с индексами по id, по (год, название) и по спортсмену.
+
+    Заполняется за один проход по строкам результатов. Количество участников
+    события считается по всем событиям с тем же годом и названием, без DNS.
+    """
+
+    def __init__(self):
+        self.events = {}
+        self.participants = defaultdict(set)
+        self.dns = defaultdict(set)
+        self.by_year_name = defaultdict(list)
+        self.by_athlete = defaultdict(set)
+        self._counts = {}
+
+    def add_event(self, event_id: str, info: Dict) -> None:
+        if event_id in self.events:
+            return
+        self.events[event_id] = info
+        self.by_year_name[(info['year'], info['name'])].append(event_id)
+
+    def add_result(self, event_id: str, athlete_name: str, place: str) -> None:
+        if place == 'DNS':
+            self.dns[event_id].add(athlete_name)
+        else:
+            self.participants[event_id].add(athlete_name)
+        self.by_athlete[athlete_name].add(event_id)
+        self._counts.clear()
+
+    def participants_count(self, year: int, event_name: str) -> int:
+        key = (year, event_name)
+        if key not in self._counts:
+            event_ids = self.by_year_name.get(key, [])
+            if len(event_ids) == 1:
+                self._counts[key] = len(self.participants.get(event_ids[0], ()))
+            else:
+                self._counts[key] = len(set().union(*(self.participants.get(i, ()) for i in event_ids)))
+        return self._counts[key]
+
+    def athlete_events(self, athlete_name: str) -> Set[str]:
+        return self.by_athlete.get(athlete_name, set())
+
+    def finalize(self) -> None:
+        for event_data in self.events.values():
+            event_data['participants_count'] = self.participants_count(event_data['year'], event_data['name'])
+
+    def items(self) -> Iterator[Tuple[str, Dict]]:
+        return iter(self.events.items())
+
+    def __len__(self) -> int:
+        return len(self.events)
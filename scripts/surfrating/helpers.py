@@ -1,9 +1,20 @@
 import string
 import hashlib
 import csv
+import fnmatch
+import os
 import re
-import pandas as pd
-from typing import Dict, Any
+from collections import Counter
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Dict, Any, Optional, Tuple
+
+_YEAR_RE       = re.compile(r'^(\d{4})$')
+_DAY_FIRST_RE  = re.compile(r'^(\d{1,2})\.(\d{1,2})\.(\d{4})$')
+_YEAR_FIRST_RE = re.compile(r'^(\d{4})\.(\d{1,2})\.(\d{1,2})(?:-\d{1,2})?$')
+_ANY_YEAR_RE   = re.compile(r'\b\d{4}\b')
+
+date_fallbacks = Counter()
 
 def validate_csv_columns(reader, required_columns: list, file_path: str) -> None:
     if reader.fieldnames is None:
@@ -12,6 +23,27 @@ def validate_csv_columns(reader, required_columns: list, file_path: str) -> None
     if missing:
         raise ValueError(f"CSV file {file_path} is missing required columns: {', '.join(missing)}")
 
+def glob_match(path: str, pattern: str) -> bool:
+    """Подходит ли путь под шаблон так же, как в glob.glob без recursive.
+
+    * и ? не переходят через /, ** равносильно *, файлы и каталоги с точкой
+    в начале подходят только под часть шаблона, которая начинается с точки.
+    """
+    path_parts = os.path.normpath(path).split(os.sep)
+    pattern_parts = os.path.normpath(pattern).split(os.sep)
+    if len(path_parts) != len(pattern_parts):
+        return False
+    return all(
+        fnmatch.fnmatch(part, part_pattern) and (not part.startswith('.') or part_pattern.startswith('.'))
+        for part, part_pattern in zip(path_parts, pattern_parts)
+    )
+
+def has_csv_columns(file_path: str, required_columns: list) -> bool:
+    """Есть ли в заголовке CSV все нужные столбцы (читается только первая строка)"""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        header = next(csv.reader(f, delimiter='|'), [])
+    return all(col in header for col in required_columns)
+
 def read_csv_file(file_path: str, required_columns: list) -> list:
     with open(file_path, 'r', encoding='utf-8') as f:
         reader = csv.DictReader(f, delimiter='|')
@@ -39,27 +71,96 @@ def generate_event_id(event_name: str, event_date: str, discipline: str, categor
     base_string = f"{normalized_name}_{normalized_date}_{normalized_discipline}_{normalized_category}"
     return hashlib.md5(base_string.encode('utf-8')).hexdigest()[:8]
 
-def extract_year(date_str: str) -> int:
-    if not date_str or pd.isna(date_str):
-        return 0
+def _parse_date_fallback(value: str) -> Tuple[Optional[date], int]:
+    import pandas as pd
+
+    parsed = pd.to_datetime(value, dayfirst=True, errors='coerce')
+    if not pd.isnull(parsed):
+        return parsed.date(), parsed.year
+
+    match = _ANY_YEAR_RE.search(value)
+    if match:
+        year = int(match.group())
+        if 1900 <= year <= datetime.now().year:
+            return None, year
+    return None, 0
 
-    try:
-        date = pd.to_datetime(date_str, dayfirst=True, errors='coerce')
-        if not pd.isnull(date):
-            return date.year
+@lru_cache(maxsize=None)
+def _parse_date(value: str) -> Tuple[Optional[date], int, bool]:
+    """Разбирает дату в форматах из данных: 'yyyy', 'dd.mm.yyyy' и 'yyyy.mm.dd[-dd]'.
 
-        match = re.search(r'\b\d{4}\b', date_str)
+    Возвращает (дата, год, использован ли медленный разбор через pandas).
+    Для диапазона дат возвращается дата начала.
+    """
+    if not value:
+        return None, 0, False
+
+    match = _YEAR_RE.match(value)
+    if match:
+        year = int(match.group(1))
+        if year < 1:
+            return None, 0, False
+        return date(year, 1, 1), year, False
+
+    match = _DAY_FIRST_RE.match(value)
+    if match:
+        day, month, year = map(int, match.groups())
+    else:
+        match = _YEAR_FIRST_RE.match(value)
         if match:
-            year = int(match.group())
-            if 1900 <= year <= datetime.now().year:
-                return year
-        return 0
-    except Exception:
-        return 0
+            year, month, day = map(int, match.groups())
+
+    if match:
+        try:
+            return date(year, month, day), year, False
+        except ValueError:
+            pass
+
+    return (*_parse_date_fallback(value), True)
+
+def _lookup_date(date_str: Any) -> Tuple[Optional[date], int]:
+    if date_str is None or date_str != date_str:
+        return None, 0
+
+    value = str(date_str).strip()
+    parsed, year, used_fallback = _parse_date(value)
+    if used_fallback:
+        date_fallbacks[value] += 1
+    return parsed, year
+
+def parse_date(date_str: str) -> Optional[date]:
+    return _lookup_date(date_str)[0]
+
+def extract_year(date_str: str) -> int:
+    return _lookup_date(date_str)[1]
+
+class EventGroupMatcher:
+    """Определяет группу события по названию.
+
+    Шаблоны каждой группы собраны в одно регулярное выражение; группы
+    проверяются в порядке объявления в конфиге, побеждает первая совпавшая.
+    Результат запоминается для каждого названия события.
+    """
+
+    def __init__(self, event_groups: Dict):
+        self.groups = [
+            (name, re.compile('|'.join(map(re.escape, data['events']))))
+            for name, data in event_groups.items()
+            if isinstance(data, dict) and data.get('events')
+        ]
+        self.cache = {}
+        self.defaulted = Counter()
+
+    def match(self, event_name: str) -> str:
+        group = self.cache.get(event_name)
+        if group is None:
+            group = next((name for name, regex in self.groups if regex.search(event_name)), 'default')
+            self.cache[event_name] = group
+        if group == 'default':
+            self.defaulted[event_name] += 1
+        return group
+
 def get_event_group(event_name: str, config: Dict) -> str:
-    for group_name, group_data in config['event_groups'].items():
-        patterns = group_data.get('events', [])
-        for pattern in patterns:
-            if pattern in event_name:
-                return group_name
-    return 'default'
+    if 'event_group_matcher' not in config:
+        config['event_group_matcher'] = EventGroupMatcher(config['event_groups'])
+    return config['event_group_matcher'].match(event_name)
@@ -0,0 +1,252 @@
+import argparse
+import bisect
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+import numpy as np
+from anonymization import get_anonymizer
+from calculations import score_results, apply_sport_rank_bonus, _best_results
+from config_loader import load_config
+from data_parser import parse_files
+from event_store import EventStore
+from helpers import parse_date
+from json_writer import JsonStreamWriter
+from model import AthleteTable
+from output import primary_output
+
+CHANGE_COLUMNS = ['athlete', 'rank', 'total_points']
+
+def window_years(config: Dict) -> Optional[int]:
+    """Длина скользящего окна в годах: history.window_years или размах allowed_years"""
+    window = config.get('history', {}).get('window_years')
+    if window:
+        return int(window)
+    allowed_years = config.get('allowed_years')
+    if allowed_years:
+        return max(allowed_years) - min(allowed_years) + 1
+    return None
+
+def history_path(config: Dict) -> Path:
+    """<ranking_json без .json>/history.json - рядом с частями рейтинга для сайта
+    (без ranking_json - рядом с CSV; с output.views - по первому представлению)"""
+    return primary_output(config, prefer='json').with_suffix('') / 'history.json'
+
+def _event_dates(event_store: EventStore) -> Dict[Tuple[int, str], str]:
+    """Дата начала события по (год, название); при нескольких датах - самая ранняя"""
+    dates = {}
+    for key, event_ids in event_store.by_year_name.items():
+        parsed = [parse_date(event_store.events[event_id].get('date', '')) for event_id in event_ids]
+        parsed = [d for d in parsed if d is not None and d.year == key[0]]
+        dates[key] = min(parsed).isoformat() if parsed else str(key[0])
+    return dates
+
+class RankHistory:
+    """Места спортсменов после каждого события за один хронологический проход.
+
+    Результаты упорядочиваются по дате события; суммы очков, последний год и
+    лучший результат обновляются только для участников очередного события, а
+    их ключи сортировки переставляются в упорядоченном списке. На границе года
+    результаты, вышедшие из окна, отбрасываются, а при включенном затухании
+    очки пересчитываются для нового текущего года - единственный полный
+    пересчет, один раз на год. В таблицу мест входят спортсмены, у которых
+    есть результаты в окне.
+    """
+
+    def __init__(self, table: AthleteTable, config: Dict, event_store: EventStore):
+        self.table = table
+        self.config = config
+        self.window = window_years(config)
+        self.n_athletes = len(table)
+        self.sorting = config['sorting']['enabled']
+
+        self.years = table.year.astype(np.int64)
+        place_lut = np.array([int(p) if p.isdigit() else -1 for p in table.places.values], dtype=np.int64)
+        self.place_num = place_lut[table.place]
+        self.bonus = apply_sport_rank_bonus(np.zeros(self.n_athletes, dtype=np.int64), table.sport_rank,
+                                            table.sport_ranks.values, config).tolist()
+        self._points = {}
+
+        dates = _event_dates(event_store)
+        n_events = max(len(table.events), 1)
+        step_keys, step_of_row = np.unique(self.years * n_events + table.event, return_inverse=True)
+        self.steps = [
+            (int(key // n_events), dates.get((int(key // n_events), table.events[int(key % n_events)]), ''),
+             table.events[int(key % n_events)])
+            for key in step_keys
+        ]
+        self.step_rows = np.split(np.argsort(step_of_row, kind='stable'),
+                                  np.cumsum(np.bincount(step_of_row, minlength=len(self.steps)))[:-1])
+
+    def points(self, year: int) -> np.ndarray:
+        """Очки всех результатов, если текущим считается год year"""
+        if not self.config['bonuses']['decay']['enabled']:
+            year = None
+        if year not in self._points:
+            config = self.config if year is None else {**self.config, 'current_year': year}
+            self._points[year] = score_results(self.table, np.ones(len(self.years), dtype=bool), config)
+        return self._points[year]
+
+    def _reset(self, year: int, done: np.ndarray) -> None:
+        """Состояние на начало года: результаты прошлых лет, попадающие в окно"""
+        self.year_points = self.points(year)
+        rows = done.copy()
+        if self.window is not None:
+            rows &= self.years > year - self.window
+        rows = np.flatnonzero(rows)
+
+        athlete = self.table.athlete[rows]
+        self.totals = np.bincount(athlete, weights=self.year_points[rows], minlength=self.n_athletes).astype(np.int64).tolist()
+        last_year = np.zeros(self.n_athletes, dtype=np.int64)
+        np.maximum.at(last_year, athlete, self.years[rows])
+        self.last_year = last_year.tolist()
+        self.active = (np.bincount(athlete, minlength=self.n_athletes) > 0).tolist()
+
+        best = _best_results(athlete, self.years[rows], self.place_num[rows], self.year_points[rows], self.n_athletes)
+        self.best = np.where(best >= 0, np.r_[rows, -1][best], -1).tolist()
+
+    def _best_key(self, row: int) -> Tuple:
+        points = int(self.year_points[row])
+        if self.place_num[row] >= 0:
+            return (0, int(self.place_num[row]), -int(self.years[row]), -points, row)
+        return (1, -points, 0, 0, row)
+
+    def _add(self, rows: np.ndarray) -> None:
+        for row in rows.tolist():
+            athlete = int(self.table.athlete[row])
+            self.totals[athlete] += int(self.year_points[row])
+            self.last_year[athlete] = max(self.last_year[athlete], int(self.years[row]))
+            self.active[athlete] = True
+            best = self.best[athlete]
+            if best < 0 or self._best_key(row) < self._best_key(best):
+                self.best[athlete] = row
+
+    def _sort_key(self, athlete: int) -> Optional[Tuple]:
+        """Ключ сортировки как в process_athletes (None - нет результатов в окне)"""
+        if not self.active[athlete]:
+            return None
+        total = self.totals[athlete] + self.bonus[athlete]
+        if not self.sorting:
+            return (-total, athlete)
+        best = self.best[athlete]
+        best_place = int(self.place_num[best]) if best >= 0 and self.place_num[best] >= 0 else 9999
+        best_year = int(self.years[best]) if best >= 0 else 0
+        return (-total, best_place, -self.last_year[athlete], -best_year, athlete)
+
+    def __iter__(self) -> Iterator[Dict]:
+        """Шаги истории: событие и спортсмены, сдвинутые им в таблице мест.
+
+        Для каждого сдвинутого спортсмена - [номер, место, очки] после события
+        ([номер, None, None] - выбыл). Порядок остальных не меняется, так что
+        полная таблица после шага получается из предыдущей: сдвинутые
+        удаляются и вставляются на свои места по возрастанию места.
+        """
+        done = np.zeros(len(self.years), dtype=bool)
+        keys = {}
+        ordered = []
+        current_year = None
+
+        for step in sorted(range(len(self.steps)), key=lambda i: self.steps[i]):
+            year, event_date, event_name = self.steps[step]
+            rows = self.step_rows[step]
+            if year != current_year:
+                self._reset(year, done)
+                current_year = year
+                touched = set(keys) | set(self.table.athlete[rows].tolist())
+            else:
+                touched = set(self.table.athlete[rows].tolist())
+            self._add(rows)
+            done[rows] = True
+
+            moved = {}
+            for athlete in touched:
+                key = self._sort_key(athlete)
+                if key != keys.get(athlete):
+                    moved[athlete] = key
+
+            if len(moved) * 4 > len(ordered):
+                keys.update(moved)
+                for athlete, key in moved.items():
+                    if key is None:
+                        del keys[athlete]
+                ordered = sorted(keys.values())
+                inserted = [key for key in moved.values() if key is not None]
+            else:
+                for athlete, key in moved.items():
+                    old = keys.pop(athlete, None)
+                    if old is not None:
+                        del ordered[bisect.bisect_left(ordered, old)]
+                    if key is not None:
+                        keys[athlete] = key
+                inserted = sorted(key for key in moved.values() if key is not None)
+                for key in inserted:
+                    bisect.insort(ordered, key)
+
+            changes = [[athlete, None, None] for athlete, key in sorted(moved.items(), key=lambda m: m[0]) if key is None]
+            for key in sorted(inserted):
+                athlete = key[-1]
+                changes.append([athlete, bisect.bisect_left(ordered, key) + 1, -key[0]])
+            yield {'date': event_date, 'year': year, 'event': event_name, 'changes': changes}
+
+def save_history(table: AthleteTable, config: Dict, event_store: EventStore, output_filename: str = None,
+                 steps: Optional[Iterable[Dict]] = None) -> Path:
+    """Пишет историю мест в компактный JSON.
+
+    athletes - спортсмены по номеру, steps - события в хронологическом порядке
+    со спортсменами, сдвинутыми каждым из них: [номер, место, очки]; место
+    null - результаты спортсмена вышли из окна (см. RankHistory.__iter__).
+    Без steps история считается здесь же.
+    """
+    path = Path(output_filename) if output_filename else history_path(config)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    anonymize = get_anonymizer(config)
+
+    with open(path, 'w', encoding='utf-8') as f:
+        writer = JsonStreamWriter(f, pretty=False)
+        writer.begin_object()
+        writer.value(config.get('discipline', 'unknown'), 'discipline')
+        writer.value(config.get('gender', 'unknown'), 'gender')
+        writer.value(datetime.now().date().isoformat(), 'last_updated')
+        writer.value(window_years(config), 'window_years')
+        writer.value(CHANGE_COLUMNS, 'change_columns')
+
+        writer.begin_array('athletes')
+        for athlete in range(len(table)):
+            info = table.athlete_info(athlete)
+            writer.value(anonymize({
+                'id': anonymize.athlete_id(info['name'], info['birth_year']),
+                'name': info['name'],
+                'birth_year': info['birth_year']
+            }))
+        writer.end_array()
+
+        writer.begin_array('steps')
+        for step in RankHistory(table, config, event_store) if steps is None else steps:
+            writer.value(step)
+        writer.end_array()
+        writer.end_object()
+    return path
+
+def main():
+    parser = argparse.ArgumentParser(description='История мест рейтинга после каждого события')
+    parser.add_argument('--config', nargs='+', required=True, help='Конфигурационные файлы рейтинга')
+    parser.add_argument('--output', help='Файл истории (по умолчанию <ranking_json без .json>/history.json)')
+    args = parser.parse_args()
+
+    try:
+        config = load_config(args.config)
+        table, event_store = parse_files(config)
+        steps = list(RankHistory(table, config, event_store))
+        path = save_history(table, config, event_store, args.output, steps)
+
+        print('Дата,Событие,Сдвинуто спортсменов,Лидер')
+        leader = ''
+        for step in steps:
+            leader = next((table.names[a] for a, rank, _ in step['changes'] if rank == 1), leader)
+            print(f"{step['date']},{step['event']},{len(step['changes'])},{leader}")
+        print(f"История сохранена: {path}")
+    except Exception as e:
+        print(f"Ошибка: {str(e)}")
+        exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+import argparse
+import csv
+import glob
+import os
+from collections import Counter, defaultdict
+from typing import Dict, FrozenSet, Iterable, List, Tuple
+from helpers import normalize_string, has_csv_columns
+
+ALIAS_COLUMNS = ['Вариант', 'Год рождения', 'ФИО']
+
+# Латинские буквы, которые в протоколах встречаются вместо похожих кириллических
+_LOOKALIKES = str.maketrans({
+    'a': 'а', 'e': 'е', 'ë': 'е', 'o': 'о', 'p': 'р', 'c': 'с', 'x': 'х',
+    'y': 'у', 'k': 'к', 'm': 'м', 't': 'т', 'h': 'н', 'b': 'в', 'ё': 'е'
+})
+
+def _normalize_token(token: str) -> str:
+    token = ''.join(ch for ch in normalize_string(token) if ch.isalpha())
+    if any('а' <= ch <= 'я' for ch in token):
+        token = token.translate(_LOOKALIKES)
+    return token
+
+def name_key(name: str) -> FrozenSet[str]:
+    """Ключ блока: нормализованные слова имени без учета порядка и ё/е"""
+    return frozenset(filter(None, map(_normalize_token, name.split())))
+
+def _birth_year_clusters(years: Iterable[int], tolerance: int) -> List[List[int]]:
+    """Известные годы рождения, сгруппированные с допуском tolerance"""
+    clusters = []
+    for year in sorted(set(years)):
+        if clusters and year - clusters[-1][-1] <= tolerance:
+            clusters[-1].append(year)
+        else:
+            clusters.append([year])
+    return clusters
+
+def resolve(records: Counter, tolerance: int = 0) -> Tuple[Dict[Tuple[str, int], str], List[List[Tuple[str, int]]]]:
+    """Сопоставляет варианты имени одному спортсмену.
+
+    records - Counter по (имя, год рождения; 0 - неизвестен). Варианты
+    разбиваются на блоки по name_key, так что сравниваются только записи
+    внутри блока и время работы линейно. Внутри блока записи с неизвестным
+    годом рождения относятся к единственной группе известных годов; если
+    групп несколько (однофамильцы), такие записи не объединяются.
+
+    Возвращает {(вариант, год рождения или 0): каноническое имя} только для
+    вариантов, отличающихся от канонического, и конфликты - варианты с годами
+    рождения для блоков с несколькими группами годов.
+    """
+    blocks = defaultdict(list)
+    for (name, birth_year), count in records.items():
+        blocks[name_key(name)].append((name, birth_year, count))
+
+    aliases = {}
+    conflicts = []
+    for key, members in blocks.items():
+        clusters = _birth_year_clusters((year for _, year, _ in members if year), tolerance)
+        if len(clusters) > 1:
+            conflicts.append(sorted({(name, year) for name, year, _ in members if year}))
+
+        groups = defaultdict(list)
+        for name, birth_year, count in members:
+            if birth_year:
+                group = next(i for i, cluster in enumerate(clusters) if birth_year in cluster)
+            elif len(clusters) <= 1:
+                group = 0
+            else:
+                continue
+            groups[group].append((name, birth_year, count))
+
+        for group in groups.values():
+            counts = Counter()
+            for name, _, count in group:
+                counts[name] += count
+            canonical = counts.most_common(1)[0][0]
+            for name in counts:
+                if name != canonical:
+                    by_year = {year for variant, year, _ in group if variant == name}
+                    if len(clusters) > 1:
+                        for year in by_year:
+                            aliases[(name, year)] = canonical
+                    else:
+                        aliases[(name, 0)] = canonical
+    return aliases, conflicts
+
+def load_aliases(path: str) -> Dict[Tuple[str, int], str]:
+    """Таблица псевдонимов: (вариант, год рождения или 0) -> каноническое имя"""
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return {
+            (row['Вариант'], int(row['Год рождения'] or 0)): row['ФИО']
+            for row in csv.DictReader(f, delimiter='|')
+        }
+
+def save_aliases(path: str, aliases: Dict[Tuple[str, int], str]) -> None:
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f, delimiter='|', lineterminator='\n')
+        writer.writerow(ALIAS_COLUMNS)
+        for (name, birth_year), canonical in sorted(aliases.items()):
+            writer.writerow([name, birth_year or '', canonical])
+
+def resolve_name(aliases: Dict[Tuple[str, int], str], name: str, birth_year: int) -> str:
+    return aliases.get((name, birth_year)) or aliases.get((name, 0)) or name
+
+def collect_records(patterns: Iterable[str], exclude: Iterable[str] = ()) -> Counter:
+    """(имя, год рождения) по всем строкам подходящих CSV с результатами.
+
+    Файлы из exclude (таблица псевдонимов) и CSV без столбцов результатов
+    (сводные таблицы) не читаются.
+    """
+    from data_parser import _parse_file, REQUIRED_COLUMNS
+
+    excluded = {os.path.abspath(path) for path in exclude}
+    records = Counter()
+    for file_path in sorted({f for pattern in patterns for f in glob.glob(pattern, recursive=True)}):
+        if os.path.abspath(file_path) in excluded or not has_csv_columns(file_path, REQUIRED_COLUMNS):
+            continue
+        try:
+            rows = _parse_file(file_path)
+        except ValueError as e:
+            print(f"Пропущен файл {file_path}: {str(e)}")
+            continue
+        for row in rows:
+            records[(row[7], row[10])] += 1
+    return records
+
+def update_aliases(path: str, patterns: Iterable[str], tolerance: int = 0) -> Tuple[Dict, Dict, List]:
+    """Дополняет таблицу псевдонимов найденными совпадениями.
+
+    Уже записанные строки (в том числе добавленные вручную) не меняются.
+    Возвращает всю таблицу, новые записи и блоки-конфликты.
+    """
+    existing = load_aliases(path)
+    found, conflicts = resolve(collect_records(patterns, exclude=[path]), tolerance)
+    added = {key: canonical for key, canonical in found.items() if key not in existing}
+    aliases = {**existing, **added}
+    save_aliases(path, aliases)
+    return aliases, added, conflicts
+
+def main():
+    parser = argparse.ArgumentParser(description='Поиск вариантов написания имен спортсменов')
+    parser.add_argument('patterns', nargs='*', default=['data/**/*.csv'], help='Шаблоны CSV файлов')
+    parser.add_argument('--aliases', default='data/athlete_aliases.csv', help='Таблица псевдонимов')
+    parser.add_argument('--tolerance', type=int, default=0,
+                        help='Допустимая разница годов рождения одного спортсмена')
+    args = parser.parse_args()
+
+    try:
+        _, added, conflicts = update_aliases(args.aliases, args.patterns, args.tolerance)
+        print('Вариант,Год рождения,ФИО')
+        for (name, birth_year), canonical in sorted(added.items()):
+            print(f"{name},{birth_year or ''},{canonical}")
+        for members in conflicts:
+            variants = '; '.join(f"{name} {birth_year}" for name, birth_year in members)
+            print(f"Разные годы рождения (не объединены): {variants}")
+    except Exception as e:
+        print(f"Ошибка: {str(e)}")
+        exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,205 @@
+import bisect
+import hashlib
+import os
+import pickle
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+from calculations import process_athletes
+from data_parser import input_files, input_key, load_file, parse_files
+from event_store import EventStore
+from model import AthleteTable
+from parse_cache import file_digest
+
+STATE_VERSION = 1
+
+def ranking_key(config: Dict) -> str:
+    """Ключ расчета: при его изменении сохраненное состояние недействительно"""
+    return repr((
+        input_key(config),
+        sorted(config.get('allowed_years') or ()),
+        config.get('current_year'),
+        config['scoring_system'],
+        config.get('scoring'),
+        config['bonuses'],
+        config['sorting']
+    ))
+
+class AthleteLog:
+    """Исходные строки результатов по спортсменам в порядке поступления.
+
+    Имеет тот же add_result, что и AthleteTable, поэтому заполняется через
+    data_parser.load_file. Порядковый номер спортсмена - номер его первого
+    появления, как индекс в AthleteTable при полном расчете.
+    """
+
+    def __init__(self):
+        self.rows = {}
+        self.index = {}
+        self.touched = set()
+
+    def add_result(self, athlete_name: str, *args) -> None:
+        if athlete_name not in self.rows:
+            self.index[athlete_name] = len(self.index)
+            self.rows[athlete_name] = []
+        self.rows[athlete_name].append(args)
+        self.touched.add(athlete_name)
+
+    def table(self, names: List[str], event_store: EventStore) -> AthleteTable:
+        """Таблица только из указанных спортсменов"""
+        table = AthleteTable()
+        for name in sorted(names, key=self.index.__getitem__):
+            for args in self.rows[name]:
+                table.add_result(name, *args)
+        table.finalize(event_store)
+        return table
+
+class IncrementalRanking:
+    """Рейтинг, который пересчитывается только для затронутых спортсменов.
+
+    Хранит события, исходные строки и готовые записи спортсменов вместе с
+    упорядоченным списком ключей сортировки. Новый файл добавляет строки,
+    после чего пересчитываются участники затронутых событий (у них мог
+    измениться participants_count, а значит и коэффициент участников), и
+    только их ключи переставляются в порядке.
+    """
+
+    def __init__(self, key: str):
+        self.version = STATE_VERSION
+        self.key = key
+        self.files = {}
+        self.event_store = EventStore()
+        self.log = AthleteLog()
+        self.entries = {}
+        self.sort_keys = {}
+        self.order = []
+
+    def _sort_key(self, entry: Dict, config: Dict) -> Tuple:
+        index = self.log.index[entry['name']]
+        if not config['sorting']['enabled']:
+            return (-entry['total_points'], index)
+
+        best = entry['best_result']
+        best_place = best['place'] if best and isinstance(best['place'], int) else 9999
+        best_year = int(best['event_year']) if best else 0
+        return (-entry['total_points'], best_place, -entry['last_year'], -best_year, index)
+
+    def _sizes(self) -> Dict[str, Tuple[int, int]]:
+        store = self.event_store
+        return {
+            event_id: (len(store.participants.get(event_id, ())), len(store.dns.get(event_id, ())))
+            for event_id in store.events
+        }
+
+    def _affected_athletes(self, sizes_before: Dict[str, Tuple[int, int]]) -> Set[str]:
+        """Спортсмены с новыми строками и все участники событий, состав которых изменился"""
+        store = self.event_store
+        affected = set(self.log.touched)
+        event_keys = {
+            (store.events[event_id]['year'], store.events[event_id]['name'])
+            for event_id, size in self._sizes().items()
+            if size != sizes_before.get(event_id)
+        }
+        for key in event_keys:
+            for event_id in store.by_year_name.get(key, ()):
+                affected.update(store.participants.get(event_id, ()))
+                affected.update(store.dns.get(event_id, ()))
+        return affected & self.log.rows.keys()
+
+    def apply_files(self, files: List[str], config: Dict) -> int:
+        """Добавляет файлы и пересчитывает затронутых спортсменов; возвращает их число"""
+        sizes_before = self._sizes()
+        self.log.touched = set()
+        for file_path in files:
+            load_file(file_path, self.log, config, self.event_store)
+            self.files[file_path] = file_digest(file_path)
+
+        affected = self._affected_athletes(sizes_before)
+        self.log.touched = set()
+        if not affected:
+            return 0
+
+        self.event_store.finalize()
+        table = self.log.table(list(affected), self.event_store)
+
+        for name in affected:
+            old_key = self.sort_keys.get(name)
+            if old_key is not None:
+                del self.order[bisect.bisect_left(self.order, old_key)]
+
+        for entry in process_athletes(table, config):
+            key = self._sort_key(entry, config)
+            self.entries[entry['name']] = entry
+            self.sort_keys[entry['name']] = key
+            bisect.insort(self.order, key)
+
+        return len(affected)
+
+    def results(self) -> List[Dict]:
+        names = list(self.log.index)
+        return [self.entries[names[key[-1]]] for key in self.order]
+
+def _state_path(config: Dict, key: str) -> Path:
+    cache_dir = config.get('cache', {}).get('dir', '.cache/surfrating')
+    return Path(cache_dir) / 'incremental' / f"{hashlib.md5(key.encode('utf-8')).hexdigest()}.pkl"
+
+def load_state(path: Path, key: str) -> Optional[IncrementalRanking]:
+    try:
+        with open(path, 'rb') as f:
+            state = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        return None
+    if getattr(state, 'version', None) != STATE_VERSION or state.key != key:
+        return None
+    return state
+
+def save_state(path: Path, state: IncrementalRanking) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix('.tmp')
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+def update_ranking(config: Dict, verbose: bool = False) -> Tuple[List[Dict], EventStore]:
+    """Рейтинг с учетом только новых входных файлов.
+
+    Новые файлы должны идти после уже учтенных (в порядке input_files), а
+    учтенные - не меняться: иначе вычесть их вклад или сохранить порядок
+    строк нельзя, и рейтинг строится заново по всем файлам.
+    """
+    if config.get('input_db', {}).get('enabled'):
+        raise ValueError("инкрементальный пересчет работает только с входными файлами (input_paths)")
+
+    key = ranking_key(config)
+    path = _state_path(config, key)
+    files = input_files(config)
+
+    state = None if config.get('cache', {}).get('rebuild') else load_state(path, key)
+    if state is not None:
+        applied = list(state.files)
+        if files[:len(applied)] != applied or any(file_digest(f) != state.files[f] for f in applied):
+            if verbose:
+                print("Учтенные файлы изменились или новые файлы идут не в конце, полный пересчет")
+            state = None
+    if state is None:
+        state = IncrementalRanking(key)
+
+    new_files = files[len(state.files):]
+    affected = state.apply_files(new_files, config)
+    if new_files:
+        save_state(path, state)
+    if verbose:
+        print(f"Новых файлов: {len(new_files)}, пересчитано спортсменов: {affected}")
+
+    return state.results(), state.event_store
+
+def verify_ranking(results: List[Dict], config: Dict) -> None:
+    """Сравнивает инкрементальный рейтинг с полным пересчетом"""
+    table, _ = parse_files(config)
+    expected = process_athletes(table, config)
+    strip = lambda entries: [{k: v for k, v in e.items() if k != 'rank'} for e in entries]
+    if strip(results) != strip(expected):
+        mismatch = next(
+            (i for i, (a, b) in enumerate(zip(strip(results), strip(expected))) if a != b),
+            min(len(results), len(expected))
+        )
+        raise ValueError(f"инкрементальный рейтинг расходится с полным пересчетом (позиция {mismatch + 1})")
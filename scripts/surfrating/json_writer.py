@@ -0,0 +1,71 @@
+import json
+from typing import Any, Optional, TextIO
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def dumps_compact(value: Any) -> str:
+    """JSON без пробелов; через orjson, если он установлен"""
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+def dumps_fragment(value: Any, pretty: bool) -> str:
+    """Значение в том виде, в каком его пишет JsonStreamWriter на верхнем уровне"""
+    return json.dumps(value, ensure_ascii=False, indent=2) if pretty else dumps_compact(value)
+
+class JsonStreamWriter:
+    """Пишет JSON-документ по частям, не собирая его целиком в памяти.
+
+    В режиме pretty результат совпадает с json.dump(..., indent=2), в компактном
+    режиме пишется без пробелов и, если установлен orjson, через него.
+    """
+
+    def __init__(self, f: TextIO, pretty: bool = True):
+        self.f = f
+        self.pretty = pretty
+        self.stack = []
+
+    def _item(self, key: Optional[Any]) -> None:
+        if self.stack:
+            if self.stack[-1]:
+                self.f.write(',')
+            self.stack[-1] += 1
+            if self.pretty:
+                self.f.write('\n' + '  ' * len(self.stack))
+        if key is not None:
+            self.f.write(json.dumps(str(key), ensure_ascii=False))
+            self.f.write(': ' if self.pretty else ':')
+
+    def _begin(self, key: Optional[Any], bracket: str) -> None:
+        self._item(key)
+        self.f.write(bracket)
+        self.stack.append(0)
+
+    def _end(self, bracket: str) -> None:
+        count = self.stack.pop()
+        if count and self.pretty:
+            self.f.write('\n' + '  ' * len(self.stack))
+        self.f.write(bracket)
+
+    def begin_object(self, key: Optional[Any] = None) -> None:
+        self._begin(key, '{')
+
+    def end_object(self) -> None:
+        self._end('}')
+
+    def begin_array(self, key: Optional[Any] = None) -> None:
+        self._begin(key, '[')
+
+    def end_array(self) -> None:
+        self._end(']')
+
+    def value(self, value: Any, key: Optional[Any] = None) -> None:
+        self.raw(dumps_fragment(value, self.pretty), key)
+
+    def raw(self, text: str, key: Optional[Any] = None) -> None:
+        """Пишет значение, уже сериализованное dumps_fragment с тем же pretty"""
+        self._item(key)
+        self.f.write(text.replace('\n', '\n' + '  ' * len(self.stack)) if self.pretty else text)
@@ -0,0 +1,111 @@
+import csv
+import itertools
+from pathlib import Path
+from typing import Dict, List
+from config_loader import load_config
+from data_parser import parse_files, input_key
+from calculations import process_athletes
+from output import generate_output
+
+def _variant_name(combo: tuple, used: set) -> str:
+    parts = [Path(p).stem if '=' not in p else p.replace('/', '_') for p in combo]
+    name = '+'.join(parts) or 'base'
+    unique_name, idx = name, 2
+    while unique_name in used:
+        unique_name = f"{name}_{idx}"
+        idx += 1
+    used.add(unique_name)
+    return unique_name
+
+def _redirect_outputs(config: Dict, variant_dir: Path) -> None:
+    output = config['output']
+    for key in ('filename', 'top5_filename', 'ranking_json'):
+        if key in output:
+            output[key] = str(variant_dir / Path(output[key]).name)
+    for view in output.get('views', []):
+        for key in ('csv', 'json'):
+            if view.get(key):
+                view[key] = str(variant_dir / Path(view[key]).name)
+
+def compare_rankings(rankings: Dict[str, Dict[str, int]], top_n: int = 5) -> List[Dict]:
+    """Сравнивает места спортсменов в каждом варианте с первым (базовым) вариантом"""
+    baseline_name = next(iter(rankings))
+    baseline = rankings[baseline_name]
+    baseline_top = {name for name, rank in baseline.items() if rank <= top_n}
+
+    stats = []
+    for variant, ranks in rankings.items():
+        shifts = [abs(rank - baseline[name]) for name, rank in ranks.items() if name in baseline]
+        variant_top = {name for name, rank in ranks.items() if rank <= top_n}
+        stats.append({
+            'variant': variant,
+            'athletes': len(ranks),
+            'changed': sum(1 for s in shifts if s),
+            'max_shift': max(shifts, default=0),
+            'top_overlap': len(baseline_top & variant_top)
+        })
+    return stats
+
+def save_rank_summary(rankings: Dict[str, Dict[str, int]], output_path: Path) -> None:
+    variants = list(rankings)
+    names = []
+    seen = set()
+    for ranks in rankings.values():
+        for name in sorted(ranks, key=ranks.get):
+            if name not in seen:
+                seen.add(name)
+                names.append(name)
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Name', *variants, 'Max Shift'])
+        for name in names:
+            ranks = [rankings[v].get(name) for v in variants]
+            present = [r for r in ranks if r is not None]
+            writer.writerow([name, *['' if r is None else r for r in ranks], max(present) - min(present)])
+
+def run_matrix(base_paths: List[str], axes: List[List[str]], output_dir: str, top_n: int = 5) -> None:
+    """Считает рейтинг для всех комбинаций наложенных конфигов в одном процессе.
+
+    Каждая ось - набор альтернативных конфигов (или переопределений key=value),
+    перебираются все их сочетания. Файлы с результатами разбираются один раз
+    для каждого уникального набора входных данных.
+    """
+    output_root = Path(output_dir)
+    parsed = {}
+    groups = {}
+    used_names = set()
+
+    for combo in itertools.product(*axes):
+        variant = _variant_name(combo, used_names)
+        config = load_config(list(base_paths) + list(combo))
+
+        key = input_key(config)
+        if key not in parsed:
+            data, event_store = parse_files(config)
+            parsed[key] = (data, event_store, {})
+            label = f"{config.get('discipline', 'unknown')}_{config.get('gender', 'unknown')}"
+            if label in groups.values():
+                label = f"{label}_{len(groups) + 1}"
+            groups[key] = label
+        data, event_store, rankings = parsed[key]
+
+        results = process_athletes(data, config)
+        _redirect_outputs(config, output_root / variant)
+        generate_output(results, config, event_store, print_console=False)
+        rankings[variant] = {athlete['name']: athlete['rank'] for athlete in results}
+
+    print('Группа,Вариант,Спортсменов,Изменений места,Макс. сдвиг,Совпадение топ-' + str(top_n))
+    for key, label in groups.items():
+        rankings = parsed[key][2]
+        save_rank_summary(rankings, output_root / f"summary_{label}.csv")
+        for row in compare_rankings(rankings, top_n):
+            print(','.join(map(str, [
+                label,
+                row['variant'],
+                row['athletes'],
+                row['changed'],
+                row['max_shift'],
+                row['top_overlap']
+            ])))
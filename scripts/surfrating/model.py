@@ -0,0 +1,145 @@
+import numpy as np
+from array import array
+
+class StringPool:
+    """Словарное кодирование повторяющихся строк: строка <-> целочисленный код"""
+    __slots__ = ('values', '_codes')
+
+    def __init__(self):
+        self.values = []
+        self._codes = {}
+
+    def encode(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def __getitem__(self, code: int) -> str:
+        return self.values[code]
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+def _first_last(keys: np.ndarray) -> tuple:
+    """Для каждого уникального ключа возвращает первую и последнюю позицию и обратный индекс"""
+    if not len(keys):
+        empty = np.empty(0, dtype=np.intp)
+        return empty, empty, empty
+
+    order = np.lexsort((np.arange(len(keys)), keys))
+    sorted_keys = keys[order]
+    starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+    ends = np.r_[starts[1:], len(keys)] - 1
+
+    inverse = np.empty(len(keys), dtype=np.intp)
+    inverse[order] = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, len(keys)]))
+    return order[starts], order[ends], inverse
+
+class AthleteTable:
+    """Колоночное хранилище спортсменов и их результатов.
+
+    Спортсмены и результаты хранятся в компактных массивах целых чисел,
+    строки (регион, разряд, категория, событие, место, группа) кодируются
+    через StringPool. Повторный результат спортсмена в том же событии того же
+    года перезаписывает предыдущий, сохраняя его позицию. После finalize
+    столбцы результатов становятся массивами NumPy и таблица только читается.
+    """
+
+    def __init__(self):
+        self.names       = StringPool()
+        self.regions     = StringPool()
+        self.sport_ranks = StringPool()
+        self.categories  = StringPool()
+        self.events      = StringPool()
+        self.places      = StringPool()
+        self.groups      = StringPool()
+
+        self.birth_year      = array('i')
+        self.category        = array('i')
+        self.region          = array('i')
+        self.region_year     = array('i')
+        self.sport_rank      = array('i')
+        self.sport_rank_year = array('i')
+
+        self.athlete            = array('i')
+        self.year               = array('i')
+        self.event              = array('i')
+        self.place              = array('i')
+        self.group              = array('i')
+        self.participants_count = array('i')
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def add_result(self, athlete_name: str, year: int, event_name: str, place: str, group: str,
+                   region: str, sport_rank: str, birth_year: int, category: str) -> None:
+        athlete = self.names.encode(athlete_name)
+        if athlete == len(self.birth_year):
+            for column in (self.birth_year, self.category, self.region, self.region_year,
+                           self.sport_rank, self.sport_rank_year):
+                column.append(0)
+            self.region[athlete] = self.regions.encode('')
+            self.sport_rank[athlete] = self.sport_ranks.encode('')
+
+        self.birth_year[athlete] = birth_year
+        self.category[athlete] = self.categories.encode(category)
+        if year >= self.region_year[athlete]:
+            self.region[athlete] = self.regions.encode(region)
+            self.region_year[athlete] = year
+        if year >= self.sport_rank_year[athlete]:
+            self.sport_rank[athlete] = self.sport_ranks.encode(sport_rank)
+            self.sport_rank_year[athlete] = year
+
+        self.athlete.append(athlete)
+        self.year.append(year)
+        self.event.append(self.events.encode(event_name))
+        self.place.append(self.places.encode(place))
+        self.group.append(self.groups.encode(group))
+
+    def finalize(self, event_store) -> None:
+        """Убирает перезаписанные результаты, упорядочивает их по спортсмену и году
+        и проставляет количество участников из хранилища событий"""
+        athlete = np.array(self.athlete, dtype=np.int64)
+        year = np.array(self.year, dtype=np.int64)
+        event = np.array(self.event, dtype=np.int64)
+        place = np.array(self.place, dtype=np.int32)
+
+        unique_years, year_idx = np.unique(year, return_inverse=True)
+        athlete_year = athlete * len(unique_years) + year_idx
+        result_key = athlete_year * max(len(self.events), 1) + event
+
+        first, last, _ = _first_last(result_key)
+        year_first, _, year_inverse = _first_last(athlete_year)
+
+        keep_athlete = athlete[first]
+        keep_order = np.lexsort((first, year_first[year_inverse[first]], keep_athlete))
+        rows = first[keep_order]
+        value_rows = last[keep_order]
+
+        self.athlete = athlete[rows].astype(np.int32)
+        self.year = year[rows].astype(np.int32)
+        self.event = event[rows].astype(np.int32)
+        self.place = place[value_rows]
+        self.group = np.array(self.group, dtype=np.int32)[rows]
+
+        n_events = max(len(self.events), 1)
+        event_keys, event_inverse = np.unique(self.year.astype(np.int64) * n_events + self.event, return_inverse=True)
+        counts = [
+            event_store.participants_count(int(key // n_events), self.events[int(key % n_events)])
+            for key in event_keys
+        ]
+        self.participants_count = np.array(counts, dtype=np.int32)[event_inverse]
+
+        for name in ('birth_year', 'category', 'region', 'sport_rank'):
+            setattr(self, name, np.array(getattr(self, name), dtype=np.int32))
+
+    def athlete_info(self, athlete: int) -> dict:
+        return {
+            'name': self.names[athlete],
+            'birth_year': int(self.birth_year[athlete]),
+            'region': self.regions[int(self.region[athlete])],
+            'category': self.categories[int(self.category[athlete])],
+            'sport_rank': self.sport_ranks[int(self.sport_rank[athlete])]
+        }
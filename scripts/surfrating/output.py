@@ -1,11 +1,19 @@
 import csv
-import json
+import gzip
+import hashlib
 from datetime import datetime
 from collections import defaultdict
 from pathlib import Path
-from typing import List, Dict, Optional, Union
-from anonymization import apply_anonymization
-from helpers import generate_event_id
+from typing import Callable, List, Dict, Optional, Union
+from anonymization import get_anonymizer
+from event_store import EventStore
+from helpers import generate_athlete_id
+from json_writer import JsonStreamWriter, dumps_compact, dumps_fragment
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
 def _resolve_output_path(output_filename: Optional[str], config: Dict, key: Optional[str] = None, default_suffix: Optional[str] = None) -> Path:
     """Обрабатывает пути для выходных файлов с учетом конфигурации"""
@@ -53,33 +61,73 @@ def prepare_row_data(athlete: Dict, years: List[int]) -> list:
         athlete['total_points']
     ]
 
-def save_to_csv(results: List[Dict], headers: List[str], years: List[int], config: Dict, output_filename: str = None) -> None:
-    output_path = _resolve_output_path(output_filename, config)
-
+def _write_csv(output_path: Path, headers: List[str], fragments: 'AthleteFragments', count: int) -> None:
     with open(output_path, 'w', encoding='utf-8', newline='') as f:
         writer = csv.writer(f)
         writer.writerow(headers)
+        writer.writerows(fragments.row(idx) for idx in range(count))
 
-        for athlete in results:
-            row = prepare_row_data(athlete, years)
-            writer.writerow(row)
-
-def save_ranking_json(results: List[Dict], config: Dict, events_info: Dict, output_filename: str = None) -> None:
-    output_path = _resolve_output_path(output_filename, config, key='ranking_json')
+def _overall_entry(athlete: Dict, athlete_refs: bool, athlete_id: Callable = generate_athlete_id) -> Dict:
+    entry = {"id": athlete_id(athlete["name"], athlete["birth_year"])} if athlete_refs else {}
+    entry.update({
+        "rank": athlete["rank"],
+        "name": athlete["name"],
+        "region": athlete["region"],
+        "sport_rank": athlete["sport_rank"],
+        "birth_year": athlete["birth_year"],
+        "total_points": athlete["total_points"],
+        "best_result": athlete.get("best_result", {}),
+        "last_year": athlete["last_year"],
+        "years_participated": list(athlete["years"].keys())
+    })
+    return entry
 
-    transformed = {
-        "discipline": config.get("discipline", "unknown"),
-        "gender": config.get("gender", "unknown"),
-        "last_updated": datetime.now().date().isoformat(),
-        "events": {},
-        "year_rankings": {},
-        "overall_ranking": []
-    }
+def _year_entry(athlete: Dict, year_data: Dict, rank: Optional[int], athlete_refs: bool,
+                athlete_id: Callable = generate_athlete_id) -> Dict:
+    if athlete_refs:
+        entry = {"id": athlete_id(athlete["name"], athlete["birth_year"])}
+    else:
+        entry = {
+            "name": athlete["name"],
+            "region": athlete["region"],
+            "sport_rank": athlete["sport_rank"],
+            "birth_year": athlete["birth_year"]
+        }
+    entry.update({
+        "year_points": year_data["year_total_points"],
+        "total_points": athlete["total_points"],
+        "events": year_data["events"]
+    })
+    if rank is not None:
+        entry["rank"] = rank
+    return entry
 
+def _year_rankings(results: List[Dict]) -> Dict[int, List[tuple]]:
+    """Места спортсменов по годам: (место, индекс спортсмена в results)"""
     year_athletes = defaultdict(list)
+    for idx, athlete in enumerate(results):
+        for year, year_data in athlete.get("years", {}).items():
+            year_athletes[year].append((year_data["year_total_points"], idx))
+
+    rankings = {}
+    for year, athletes in year_athletes.items():
+        athletes.sort(key=lambda x: x[0], reverse=True)
+
+        ranked = []
+        current_rank = 1
+        prev_points = None
+        for i, (points, idx) in enumerate(athletes):
+            if points != prev_points:
+                current_rank = i + 1
+            ranked.append((current_rank, idx))
+            prev_points = points
+        rankings[year] = ranked
+    return rankings
 
-    for event_id, event_data in events_info.items():
-        transformed["events"][f"{event_data['year']}_{event_id[:4]}"] = {
+def _events_dict(event_store: EventStore) -> Dict[str, Dict]:
+    events = {}
+    for event_id, event_data in event_store.items():
+        events[f"{event_data['year']}_{event_id[:4]}"] = {
             "id": event_id,
             "name": event_data['name'],
             "year": event_data['year'],
@@ -88,72 +136,266 @@ def save_ranking_json(results: List[Dict], config: Dict, events_info: Dict, outp
             "group": event_data['group'],
             "participants_count": event_data['participants_count']
         }
+    return events
 
-    for athlete in results:
-        overall_entry = {
-            "rank": athlete["rank"],
-            "name": athlete["name"],
-            "region": athlete["region"],
-            "sport_rank": athlete["sport_rank"],
-            "birth_year": athlete["birth_year"],
-            "total_points": athlete["total_points"],
-            "best_result": athlete.get("best_result", {}),
-            "last_year": athlete["last_year"],
-            "years_participated": list(athlete["years"].keys())
-        }
-        transformed["overall_ranking"].append(overall_entry)
+class AthleteFragments:
+    """Строки CSV и JSON-фрагменты спортсменов, общие для всех представлений рейтинга.
 
-        for year, year_data in athlete.get("years", {}).items():
-            year_entry = {
-                "name": athlete["name"],
-                "region": athlete["region"],
-                "sport_rank": athlete["sport_rank"],
-                "birth_year": athlete["birth_year"],
-                "year_points": year_data["year_total_points"],
-                "total_points": athlete["total_points"],
-                "events": year_data["events"]
-            }
-            year_athletes[year].append(year_entry)
+    Каждая строка и каждая запись сериализуется не больше одного раза, сколько
+    бы представлений ее ни выводили. Запись года хранится без места: место
+    зависит от представления (в топ-N места по годам считаются среди первых N)
+    и дописывается в конец готового текста.
+    """
 
-    for year, athletes in year_athletes.items():
-        athletes.sort(key=lambda x: x["year_points"], reverse=True)
+    def __init__(self, results: List[Dict], config: Dict, years: List[int], event_store: Optional[EventStore]):
+        self.results = results
+        self.years = years
+        self.event_store = event_store
+        self.pretty = config['output'].get('json_format', 'pretty') != 'compact'
+        self.athlete_refs = config['output'].get('json_athlete_refs', False)
+        self.anonymize = get_anonymizer(config)
+        self._rows = {}
+        self._overall = {}
+        self._year_entries = {}
+        self._events = None
 
-        current_rank = 1
-        prev_points = None
-        for i, athlete in enumerate(athletes):
-            if athlete["year_points"] != prev_points:
-                current_rank = i + 1
-            athlete["rank"] = current_rank
-            prev_points = athlete["year_points"]
+    def row(self, idx: int) -> list:
+        row = self._rows.get(idx)
+        if row is None:
+            athlete = self.results[idx]
+            row = self._rows[idx] = prepare_row_data(athlete, self.years)
+            if self.anonymize.enabled:
+                row[1] = self.anonymize.pseudonym(athlete['name'], athlete['birth_year'])
+                row[3] = ''
+        return row
+
+    def overall(self, idx: int) -> str:
+        text = self._overall.get(idx)
+        if text is None:
+            entry = self.anonymize(_overall_entry(self.results[idx], self.athlete_refs, self.anonymize.athlete_id))
+            text = self._overall[idx] = dumps_fragment(entry, self.pretty)
+        return text
 
-        transformed["year_rankings"][year] = {"athletes": athletes}
+    def year_entry(self, idx: int, year: int, rank: int) -> str:
+        text = self._year_entries.get((idx, year))
+        if text is None:
+            athlete = self.results[idx]
+            entry = self.anonymize(_year_entry(athlete, athlete["years"][year], None, self.athlete_refs,
+                                               self.anonymize.athlete_id))
+            text = self._year_entries[(idx, year)] = dumps_fragment(entry, self.pretty)
+        if self.pretty:
+            return f'{text[:-2]},\n  "rank": {rank}\n}}'
+        return f'{text[:-1]},"rank":{rank}}}'
 
-    transformed = apply_anonymization(transformed, config)
+    def events(self) -> List[tuple]:
+        if self._events is None:
+            self._events = [
+                (key, dumps_fragment(event, self.pretty))
+                for key, event in _events_dict(self.event_store).items()
+            ]
+        return self._events
+
+def _write_ranking_json(output_path: Path, config: Dict, fragments: AthleteFragments, count: int) -> None:
+    results = fragments.results[:count]
 
     with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(transformed, f, ensure_ascii=False, indent=2)
+        writer = JsonStreamWriter(f, fragments.pretty)
+        writer.begin_object()
+        writer.value(config.get("discipline", "unknown"), "discipline")
+        writer.value(config.get("gender", "unknown"), "gender")
+        writer.value(datetime.now().date().isoformat(), "last_updated")
+
+        writer.begin_object("events")
+        for key, text in fragments.events():
+            writer.raw(text, key)
+        writer.end_object()
 
-def print_to_console(results: List[Dict], headers: List[str], years: List[int], config: Dict) -> None:
+        writer.begin_object("year_rankings")
+        for year, ranked in _year_rankings(results).items():
+            writer.begin_object(year)
+            writer.begin_array("athletes")
+            for rank, idx in ranked:
+                writer.raw(fragments.year_entry(idx, year, rank))
+            writer.end_array()
+            writer.end_object()
+        writer.end_object()
+
+        writer.begin_array("overall_ranking")
+        for idx in range(count):
+            writer.raw(fragments.overall(idx))
+        writer.end_array()
+
+        writer.end_object()
+
+def save_ranking_json(results: List[Dict], config: Dict, event_store: EventStore, output_filename: str = None) -> None:
+    output_path = _resolve_output_path(output_filename, config, key='ranking_json')
+    _write_ranking_json(output_path, config, AthleteFragments(results, config, [], event_store), len(results))
+
+def _write_shard(path: Path, value, compress: List[str], files: Dict[str, Dict], root: Path) -> None:
+    """Пишет JSON-файл и его сжатые копии; неизмененные файлы не перезаписываются"""
+    data = dumps_compact(value).encode('utf-8')
+    files[path.relative_to(root).as_posix()] = {
+        "bytes": len(data),
+        "sha256": hashlib.sha256(data).hexdigest()
+    }
+    variants = {}
+    if 'gz' in compress:
+        variants['.gz'] = lambda: gzip.compress(data, compresslevel=9, mtime=0)
+    if 'br' in compress and brotli is not None:
+        variants['.br'] = lambda: brotli.compress(data)
+
+    compressed = [path.with_name(path.name + suffix) for suffix in variants]
+    if path.exists() and all(p.exists() for p in compressed) and path.read_bytes() == data:
+        return
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    for target, compress_data in zip(compressed, variants.values()):
+        target.write_bytes(compress_data())
+
+def _remove_stale_shards(directory: Path, keep: set) -> None:
+    for path in directory.glob('*.json*'):
+        if path.name.split('.json')[0] + '.json' not in keep:
+            path.unlink()
+
+def save_ranking_shards(results: List[Dict], config: Dict, event_store: EventStore, output_filename: str = None) -> List[Path]:
+    """Пишет рейтинг частями для веб-интерфейса.
+
+    Рядом с ranking JSON создается каталог с тем же именем: summary.json
+    (место, спортсмен, очки по годам, лучший результат), years/<год>.json с
+    результатами года, athletes/<id>.json с полной историей спортсмена,
+    events.json и manifest.json со списком файлов. Каждый файл также
+    сохраняется сжатым (.gz и, если установлен brotli, .br). Возвращает
+    пути всех файлов частей, включая сжатые копии. Два спортсмена с
+    одинаковым id (имя и год рождения или их хэш) - ошибка, а не
+    перезапись файла одного из них.
+    """
+    root = _resolve_output_path(output_filename, config, key='ranking_json').with_suffix('')
+    compress = config['output']['shards'].get('compress', ['gz', 'br'])
+    anonymize = get_anonymizer(config)
+    files = {}
+
+    summary = []
+    athlete_names = {}
+    for athlete in results:
+        entry = anonymize(_overall_entry(athlete, True, anonymize.athlete_id))
+        if entry['id'] in athlete_names:
+            raise ValueError(f"Спортсмены {athlete_names[entry['id']]} и {entry['name']} получили одинаковый "
+                             f"id {entry['id']}: их файлы в athletes/ совпадут")
+        athlete_names[entry['id']] = entry['name']
+        entry.pop("years_participated")
+        entry["year_points"] = {year: data["year_total_points"] for year, data in athlete["years"].items()}
+        summary.append(entry)
+
+        detail = anonymize({**_overall_entry(athlete, True, anonymize.athlete_id), "years": athlete["years"]})
+        detail.pop("years_participated")
+        _write_shard(root / 'athletes' / f"{entry['id']}.json", detail, compress, files, root)
+
+    years = {}
+    for year, ranked in _year_rankings(results).items():
+        years[year] = f"years/{year}.json"
+        _write_shard(root / years[year], {
+            "year": year,
+            "athletes": [
+                _year_entry(results[idx], results[idx]["years"][year], rank, True, anonymize.athlete_id)
+                for rank, idx in ranked
+            ]
+        }, compress, files, root)
+
+    _remove_stale_shards(root / 'athletes', {f"{athlete_id}.json" for athlete_id in athlete_names})
+    _remove_stale_shards(root / 'years', {f"{year}.json" for year in years})
+
+    meta = {
+        "discipline": config.get("discipline", "unknown"),
+        "gender": config.get("gender", "unknown"),
+        "last_updated": datetime.now().date().isoformat()
+    }
+    _write_shard(root / 'summary.json', {**meta, "years": sorted(years), "athletes": summary}, compress, files, root)
+    _write_shard(root / 'events.json', _events_dict(event_store), compress, files, root)
+
+    manifest = {
+        **meta,
+        "summary": "summary.json",
+        "events": "events.json",
+        "years": years,
+        "athlete": "athletes/{id}.json",
+        "compression": [c for c in compress if c != 'br' or brotli is not None],
+        "files": files
+    }
+    _write_shard(root / 'manifest.json', manifest, compress, {}, root)
+    suffixes = [''] + [f".{c}" for c in manifest["compression"]]
+    return [root / f"{name}{suffix}" for name in [*files, 'manifest.json'] for suffix in suffixes]
+
+def output_views(config: Dict) -> List[Dict]:
+    """Представления рейтинга из output.views.
+
+    Без явного списка представления строятся из прежних ключей: полный
+    рейтинг (filename, ranking_json, shards) и, если задан top5_filename,
+    топ-5 в CSV и JSON рядом с ним.
+    """
+    output = config['output']
+    if 'views' in output:
+        views = [dict(view) for view in output['views']]
+        for view in views:
+            if view.get('shards') and not view.get('json'):
+                raise ValueError(f"Представление {view.get('name')}: shards требует json")
+        return views
+
+    views = [{'name': 'full', 'csv': output['filename'], 'console': True}]
+    if 'ranking_json' in output:
+        views[0]['json'] = output['ranking_json']
+        views[0]['shards'] = output.get('shards', {}).get('enabled', False)
+    if 'top5_filename' in output:
+        views.append({
+            'name': 'top5',
+            'limit': 5,
+            'csv': output['top5_filename'],
+            'json': str(Path(output['top5_filename']).with_suffix('.json')),
+            'console': True
+        })
+    return views
+
+def primary_output(config: Dict, prefer: str = 'csv') -> Path:
+    """Основной файл рейтинга: csv или json (prefer) первого представления, в котором задан файл"""
+    other = 'json' if prefer == 'csv' else 'csv'
+    for view in output_views(config):
+        path = view.get(prefer) or view.get(other)
+        if path:
+            return Path(path)
+    raise ValueError("В output не задано ни одного файла рейтинга")
+
+def _print_rows(headers: List[str], fragments: AthleteFragments, count: int) -> None:
     print(','.join(map(str, headers)))
-    for athlete in results[:config['top_n']]:
-        row = prepare_row_data(athlete, years)
-        print(','.join(map(str, row)))
+    for idx in range(count):
+        print(','.join(map(str, fragments.row(idx))))
 
-def generate_output(results: List[Dict], config: Dict, events_info: Dict) -> None:
+def generate_output(results: List[Dict], config: Dict, event_store: EventStore, print_console: bool = True) -> List[Path]:
+    """Присваивает места и выводит рейтинг во все представления за один проход.
+
+    Строка и JSON-записи спортсмена готовятся один раз и используются всеми
+    представлениями; представление с limit выводит первых limit спортсменов.
+    Возвращает пути записанных файлов.
+    """
     for idx, athlete in enumerate(results, 1):
         athlete['rank'] = idx
 
     headers, years = prepare_headers_and_years(results, config)
+    fragments = AthleteFragments(results, config, years, event_store)
+    written = []
 
-    save_to_csv(results, headers, years, config)
-    save_ranking_json(results, config, events_info)
-    print_to_console(results, headers, years, config)
-
-    if 'top5_filename' in config['output']:
-        top5 = results[:5]
-        csv_path = config['output']['top5_filename']
-        json_path = Path(csv_path).with_suffix('.json')
-
-        save_to_csv(top5, headers, years, config, csv_path)
-        save_ranking_json(top5, config, events_info, json_path)
-        print_to_console(top5, headers, years, config)
+    for view in output_views(config):
+        limit = view.get('limit')
+        count = len(results) if limit is None else min(limit, len(results))
+        if view.get('csv'):
+            path = _resolve_output_path(view['csv'], config)
+            _write_csv(path, headers, fragments, count)
+            written.append(path)
+        if view.get('json'):
+            path = _resolve_output_path(view['json'], config)
+            _write_ranking_json(path, config, fragments, count)
+            written.append(path)
+        if view.get('shards'):
+            written.extend(save_ranking_shards(results[:count], config, event_store, view['json']))
+        if print_console and view.get('console'):
+            _print_rows(headers, fragments, min(count, config['top_n']))
+    return written
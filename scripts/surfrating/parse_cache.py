@@ -0,0 +1,99 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from helpers import date_fallbacks
+
+CACHE_VERSION = 3
+
+def file_digest(file_path: str) -> str:
+    """SHA-256 содержимого файла"""
+    with open(file_path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def _cache_path(cache_dir: str, file_path: str) -> Path:
+    key = hashlib.md5(os.path.abspath(file_path).encode('utf-8')).hexdigest()
+    return Path(cache_dir) / 'parse' / f"{key}.json"
+
+def _load_entry(cache_file: Path) -> Optional[Dict]:
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return entry if entry.get('version') == CACHE_VERSION else None
+
+def store_json_atomic(cache_file: Path, entry: Dict) -> None:
+    """Записывает JSON через временный файл, чтобы читатели не видели файл записанным наполовину"""
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = cache_file.with_suffix(f'.{os.getpid()}.tmp')
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(entry, f, ensure_ascii=False)
+    os.replace(tmp_file, cache_file)
+
+# Разобранные файлы текущего процесса: путь -> ((размер, время изменения), строки,
+# даты, разобранные через pandas). Долгоживущий процесс (rating.py --watch)
+# не читает JSON кэша повторно.
+_memory = {}
+
+def _parse(file_path: str, parse: Callable[[str], List]) -> Tuple[List, Dict[str, int]]:
+    """Разбирает файл; возвращает строки и даты, которые при этом разобраны через pandas"""
+    before = date_fallbacks.copy()
+    rows = parse(file_path)
+    return rows, dict(date_fallbacks - before)
+
+def _load_or_parse(file_path: str, parse: Callable[[str], List], cache_config: Dict,
+                   stat: os.stat_result) -> Tuple[List, Dict[str, int]]:
+    """Строки файла и его даты, разобранные через pandas; для записи из кэша
+    они добавляются в helpers.date_fallbacks, как при разборе"""
+    cache_file = _cache_path(cache_config.get('dir', '.cache/surfrating'), file_path)
+    entry = None if cache_config.get('rebuild') else _load_entry(cache_file)
+
+    if entry and entry['path'] == file_path:
+        if entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime_ns:
+            date_fallbacks.update(entry['date_fallbacks'])
+            return entry['rows'], entry['date_fallbacks']
+
+        digest = file_digest(file_path)
+        if entry['sha256'] == digest:
+            entry.update(size=stat.st_size, mtime=stat.st_mtime_ns)
+            store_json_atomic(cache_file, entry)
+            date_fallbacks.update(entry['date_fallbacks'])
+            return entry['rows'], entry['date_fallbacks']
+    else:
+        digest = file_digest(file_path)
+
+    rows, fallbacks = _parse(file_path, parse)
+    store_json_atomic(cache_file, {
+        'version': CACHE_VERSION,
+        'path': file_path,
+        'size': stat.st_size,
+        'mtime': stat.st_mtime_ns,
+        'sha256': digest,
+        'rows': rows,
+        'date_fallbacks': fallbacks
+    })
+    return rows, fallbacks
+
+def cached_parse(file_path: str, parse: Callable[[str], List], config: Dict) -> List:
+    """Возвращает разобранные строки файла из кэша или разбирает файл заново.
+
+    Запись считается актуальной, если совпадают размер и время изменения файла,
+    либо, если они изменились, хэш содержимого. Даты файла, разобранные через
+    pandas, учитываются в helpers.date_fallbacks и при чтении из кэша.
+    """
+    cache_config = config.get('cache', {})
+    if not cache_config.get('enabled', True):
+        return parse(file_path)
+
+    stat = os.stat(file_path)
+    version = (stat.st_size, stat.st_mtime_ns)
+    memo = _memory.get(file_path)
+    if memo and memo[0] == version and not cache_config.get('rebuild'):
+        date_fallbacks.update(memo[2])
+        return memo[1]
+
+    rows, fallbacks = _load_or_parse(file_path, parse, cache_config, stat)
+    _memory[file_path] = (version, rows, fallbacks)
+    return rows
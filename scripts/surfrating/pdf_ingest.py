@@ -0,0 +1,368 @@
+import argparse
+import csv
+import glob
+import json
+import os
+import re
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from helpers import read_csv_file, extract_year, normalize_string
+from parse_cache import file_digest, store_json_atomic
+
+try:
+    import pdfplumber
+except ImportError:
+    pdfplumber = None
+
+EXTRACT_VERSION = 2
+
+DEFAULT_PATTERNS = ['data/**/_pdf/**/*.pdf']
+DEFAULT_CACHE_DIR = '.cache/surfrating/pdf'
+DEFAULT_OUTPUT_DIR = 'output/ingest'
+
+CSV_COLUMNS = [
+    'Год', 'Дата', 'Событие', 'Место проведения', 'Вид спорта', 'Дисциплина',
+    'Категория', 'Место', 'ФИО', 'Год рождения', 'Разряд', 'Регион'
+]
+EVENT_COLUMNS = CSV_COLUMNS[:7]
+COMPARED_COLUMNS = ['Дата', 'Место проведения', 'Место', 'Год рождения', 'Разряд', 'Регион']
+
+# Заголовки столбцов протокола (после _header_key) -> столбцы CSV;
+# "Вып. разряд/звание" (выполненный на соревновании) не используется
+HEADER_COLUMNS = {
+    'место': 'Место',
+    'фио': 'ФИО',
+    'фамилия имя': 'ФИО',
+    'фамилия имя отчество': 'ФИО',
+    'спортсмен': 'ФИО',
+    'год рождения': 'Год рождения',
+    'дата рождения': 'Год рождения',
+    'гр': 'Год рождения',
+    'субъект рф': 'Регион',
+    'регион': 'Регион',
+    'разряд звание': 'Разряд',
+    'разряд': 'Разряд',
+    'звание': 'Разряд'
+}
+
+SPORTS = [('вейксерф', 'вейксерфинг'), ('вейкбординг', 'вейксерфинг'), ('серф', 'серфинг')]
+DISCIPLINES = ['длинная доска', 'короткая доска', 'вейкским', 'вейксерфинг']
+CATEGORIES = {'мужчин': 'мужчины', 'женщин': 'женщины', 'юниор': 'юниоры', 'девушк': 'девушки'}
+CATEGORY_SLUGS = {'мужчины': 'men', 'женщины': 'women'}
+MONTHS = {
+    'январ': 1, 'феврал': 2, 'март': 3, 'апрел': 4, 'ма': 5, 'июн': 6,
+    'июл': 7, 'август': 8, 'сентябр': 9, 'октябр': 10, 'ноябр': 11, 'декабр': 12
+}
+
+_DATE_RE = re.compile(r'(\d{1,2})(?:\s*[-–]\s*(\d{1,2}))?\s+([а-яё]+)\s+(\d{4})', re.IGNORECASE)
+_CATEGORY_RE = re.compile('|'.join(CATEGORIES), re.IGNORECASE)
+
+def _cell(value: Optional[str]) -> str:
+    return ' '.join((value or '').split())
+
+def _header_key(value: Optional[str]) -> str:
+    return ' '.join(re.sub(r'[^\w\s]', ' ', _cell(value).lower().replace('ё', 'е')).split())
+
+def _month(word: str) -> Optional[int]:
+    word = word.lower()
+    return next((number for stem, number in MONTHS.items() if word.startswith(stem)), None)
+
+def parse_header(lines: List[str], meta: Dict[str, str]) -> Dict[str, str]:
+    """Сведения о событии из текста над таблицей; не найденные поля берутся из meta.
+
+    Название события - начало первой строки до " по ...", вид спорта и
+    дисциплина - по словарям, дата и место проведения - из строки вида
+    "Приморский край, г. Владивосток 03-15 октября 2024 г.", категория -
+    последнее упоминание мужчин/женщин ("Официальные результаты. Мужчины").
+    """
+    meta = dict(meta)
+    text = ' '.join(lines).lower().replace('ё', 'е')
+    if lines:
+        title = lines[0].split(' по ')[0].split(',')[0].strip()
+        if title and ' по ' in lines[0]:
+            meta['Событие'] = title
+    for stem, sport in SPORTS:
+        if stem in text:
+            meta['Вид спорта'] = sport
+            break
+    discipline = next((d for d in DISCIPLINES if d in text), None)
+    if discipline:
+        meta['Дисциплина'] = discipline
+
+    for line in lines:
+        match = _DATE_RE.search(line)
+        month = _month(match.group(3)) if match else None
+        if month:
+            day, last_day, _, year = match.groups()
+            meta['Год'] = year
+            meta['Дата'] = f"{year}.{month:02d}.{int(day):02d}" + (f"-{int(last_day):02d}" if last_day else '')
+            place = line[:match.start()].strip(' ,')
+            if place:
+                meta['Место проведения'] = place.split('г.')[-1].split(',')[-1].strip()
+            break
+
+    categories = _CATEGORY_RE.findall(text)
+    if categories:
+        meta['Категория'] = CATEGORIES[categories[-1].lower()]
+    return meta
+
+def _column_map(header: List[Optional[str]]) -> Optional[Dict[int, str]]:
+    """Индексы столбцов таблицы -> столбцы CSV, если строка похожа на заголовок"""
+    columns = {}
+    for idx, cell in enumerate(header):
+        column = HEADER_COLUMNS.get(_header_key(cell))
+        if column and column not in columns.values():
+            columns[idx] = column
+    return columns if {'Место', 'ФИО'} <= set(columns.values()) else None
+
+def _page_header(page, table) -> List[str]:
+    """Строки текста страницы над таблицей"""
+    top = table.bbox[1]
+    area = page.crop((0, 0, page.width, max(top, 1)))
+    return [line for line in (area.extract_text() or '').splitlines() if line.strip()]
+
+def extract_pdf(path: str) -> Dict:
+    """Строки результатов протокола в столбцах CSV.
+
+    Таблицы без строки заголовка считаются продолжением предыдущей, страницы
+    без текста наследуют сведения о событии с предыдущей страницы.
+    scanned_pages - номера страниц без текстового слоя: их строки не извлечены.
+    """
+    if pdfplumber is None:
+        raise RuntimeError("Не установлен пакет pdfplumber")
+
+    rows, warnings = [], []
+    meta = {column: '' for column in EVENT_COLUMNS}
+    columns = None
+    scanned = []
+    with pdfplumber.open(path) as pdf:
+        page_count = len(pdf.pages)
+        for page_number, page in enumerate(pdf.pages, 1):
+            if not (page.extract_text() or '').strip():
+                scanned.append(page_number)
+            for table in page.find_tables():
+                cells = table.extract()
+                if not cells:
+                    continue
+                header_columns = _column_map(cells[0])
+                if header_columns:
+                    columns = header_columns
+                    meta = parse_header(_page_header(page, table), meta)
+                    cells = cells[1:]
+                elif columns is None:
+                    warnings.append(f"стр. {page_number}: таблица без заголовка пропущена")
+                    continue
+
+                for cell_row in cells:
+                    values = {column: _cell(cell_row[idx]) for idx, column in columns.items() if idx < len(cell_row)}
+                    if not values.get('ФИО') or not values.get('Место'):
+                        continue
+                    birth_year = extract_year(values.get('Год рождения', ''))
+                    rows.append([
+                        *(meta[column] for column in EVENT_COLUMNS),
+                        values['Место'].upper(),
+                        values['ФИО'],
+                        str(birth_year) if birth_year else '',
+                        values.get('Разряд', ''),
+                        values.get('Регион', '')
+                    ])
+
+    if scanned and len(scanned) == page_count:
+        warnings.append("нет текстового слоя (скан): нужно распознавание текста")
+    elif scanned:
+        warnings.append(f"страницы без текстового слоя: {' '.join(map(str, scanned))}")
+    if not rows and len(scanned) < page_count:
+        warnings.append("таблицы результатов не найдены")
+    for column in ('Год', 'Событие', 'Категория'):
+        if rows and not all(row[CSV_COLUMNS.index(column)] for row in rows):
+            warnings.append(f"не удалось определить: {column}")
+    return {'rows': rows, 'warnings': warnings, 'scanned_pages': scanned}
+
+def _cache_file(cache_dir: str, digest: str) -> Path:
+    return Path(cache_dir) / f"{digest}.json"
+
+def _load_cached(cache_file: Path) -> Optional[Dict]:
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return entry if entry.get('version') == EXTRACT_VERSION else None
+
+def extract_all(paths: List[str], cache_dir: str = DEFAULT_CACHE_DIR, workers: int = 0,
+                rebuild: bool = False) -> Dict[str, Dict]:
+    """Извлекает протоколы в пуле процессов.
+
+    Кэш - по хэшу содержимого PDF: неизмененный протокол не обрабатывается
+    повторно, даже если его переименовали или перенесли.
+    """
+    results, pending = {}, {}
+    for path in paths:
+        digest = file_digest(path)
+        entry = None if rebuild else _load_cached(_cache_file(cache_dir, digest))
+        if entry is not None:
+            results[path] = {**entry, 'cached': True}
+        else:
+            pending[path] = digest
+
+    if pending:
+        max_workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(pending))) as pool:
+            futures = {path: pool.submit(extract_pdf, path) for path in pending}
+            for path, future in futures.items():
+                try:
+                    entry = {'version': EXTRACT_VERSION, 'sha256': pending[path], **future.result()}
+                except Exception as e:
+                    results[path] = {'rows': [], 'warnings': [f"{type(e).__name__}: {e}"], 'scanned_pages': [],
+                                     'cached': False}
+                    continue
+                store_json_atomic(_cache_file(cache_dir, pending[path]), entry)
+                results[path] = {**entry, 'cached': False}
+    return {path: results[path] for path in paths}
+
+def _event_key(row: List[str]) -> Tuple:
+    """(год, событие, дисциплина, категория) строки в столбцах CSV"""
+    return tuple(normalize_string(row[CSV_COLUMNS.index(column)])
+                 for column in ('Год', 'Событие', 'Дисциплина', 'Категория'))
+
+def _athlete_key(name: str) -> str:
+    return normalize_string(' '.join(name.split()[:2]))
+
+def load_existing(patterns: List[str], exclude: str) -> Dict[Tuple, Dict]:
+    """Строки существующих CSV по событиям: ключ события -> {файл, строки по спортсмену}"""
+    existing = {}
+    exclude = os.path.abspath(exclude)
+    for file_path in sorted({f for pattern in patterns for f in glob.glob(pattern, recursive=True)}):
+        if os.path.abspath(file_path).startswith(exclude + os.sep):
+            continue
+        try:
+            csv_rows = read_csv_file(file_path, CSV_COLUMNS)
+        except ValueError:
+            continue
+        for csv_row in csv_rows:
+            row = [(csv_row[column] or '').strip() for column in CSV_COLUMNS]
+            group = existing.setdefault(_event_key(row), {'file': file_path, 'athletes': {}})
+            group['athletes'][_athlete_key(row[CSV_COLUMNS.index('ФИО')])] = row
+    return existing
+
+def diff_rows(rows: List[List[str]], existing: Dict[Tuple, Dict], complete: bool = True) -> List[Dict]:
+    """Отличия извлеченных строк от существующих CSV того же события.
+
+    Если часть протокола не извлечена (complete=False, страницы-сканы),
+    отсутствие спортсмена в PDF не проверяется: такие строки CSV
+    помечаются как непроверенные.
+    """
+    diffs = []
+    name_idx = CSV_COLUMNS.index('ФИО')
+    groups = defaultdict(list)
+    for row in rows:
+        groups[_event_key(row)].append(row)
+
+    for key, group_rows in groups.items():
+        group = existing.get(key)
+        if group is None:
+            diffs.append({'csv': '', 'name': '', 'column': '', 'old': '', 'new': f"новое событие, строк: {len(group_rows)}"})
+            continue
+        seen = set()
+        for row in group_rows:
+            athlete = _athlete_key(row[name_idx])
+            seen.add(athlete)
+            old = group['athletes'].get(athlete)
+            if old is None:
+                diffs.append({'csv': group['file'], 'name': row[name_idx], 'column': '', 'old': '', 'new': 'нет в CSV'})
+                continue
+            for column in COMPARED_COLUMNS:
+                idx = CSV_COLUMNS.index(column)
+                if normalize_string(old[idx]) != normalize_string(row[idx]):
+                    diffs.append({'csv': group['file'], 'name': row[name_idx], 'column': column,
+                                  'old': old[idx], 'new': row[idx]})
+        for athlete, old in group['athletes'].items():
+            if athlete not in seen:
+                status = 'нет в PDF' if complete else 'не проверено: в PDF есть страницы без текста'
+                diffs.append({'csv': group['file'], 'name': old[name_idx], 'column': '', 'old': '', 'new': status})
+    return diffs
+
+def _output_stem(pdf_path: str, output_dir: str) -> Path:
+    """<output_dir>/<путь протокола от data без _pdf>/<имя протокола>"""
+    parts = [part for part in Path(pdf_path).with_suffix('').parts if part != '_pdf']
+    if parts and parts[0] == 'data':
+        parts = parts[1:]
+    return Path(output_dir, *parts)
+
+def save_csvs(pdf_path: str, rows: List[List[str]], output_dir: str) -> List[Path]:
+    """Пишет извлеченные строки в CSV с разделителем |, по файлу на категорию"""
+    categories = defaultdict(list)
+    for row in rows:
+        categories[row[CSV_COLUMNS.index('Категория')]].append(row)
+
+    stem = _output_stem(pdf_path, output_dir)
+    paths = []
+    for category, category_rows in categories.items():
+        slug = CATEGORY_SLUGS.get(category, normalize_string(category) or 'unknown')
+        path = stem.with_name(f"{stem.name}_{slug}.csv")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f, delimiter='|', lineterminator='\n')
+            writer.writerow(CSV_COLUMNS)
+            writer.writerows(category_rows)
+        paths.append(path)
+    return paths
+
+def save_diff(diffs: Dict[str, List[Dict]], path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f, delimiter='|', lineterminator='\n')
+        writer.writerow(['PDF', 'CSV', 'ФИО', 'Столбец', 'В CSV', 'В PDF'])
+        for pdf_path, pdf_diffs in diffs.items():
+            for diff in pdf_diffs:
+                writer.writerow([pdf_path, diff['csv'], diff['name'], diff['column'], diff['old'], diff['new']])
+
+def ingest(patterns: List[str], csv_patterns: List[str], output_dir: str = DEFAULT_OUTPUT_DIR,
+           cache_dir: str = DEFAULT_CACHE_DIR, workers: int = 0, rebuild: bool = False) -> List[Dict]:
+    """Извлекает протоколы в CSV (в output_dir) и сравнивает их с существующими CSV.
+
+    Существующие файлы в data не изменяются; отличия пишутся в <output_dir>/diff.csv.
+    """
+    paths = sorted({f for pattern in patterns for f in glob.glob(pattern, recursive=True)})
+    extracted = extract_all(paths, cache_dir, workers, rebuild)
+    existing = load_existing(csv_patterns, output_dir)
+
+    reports, diffs = [], {}
+    for path, entry in extracted.items():
+        diffs[path] = diff_rows(entry['rows'], existing, complete=not entry['scanned_pages'])
+        save_csvs(path, entry['rows'], output_dir)
+        reports.append({
+            'pdf': path,
+            'rows': len(entry['rows']),
+            'diffs': len(diffs[path]),
+            'cached': entry['cached'],
+            'warnings': entry['warnings']
+        })
+    save_diff(diffs, Path(output_dir) / 'diff.csv')
+    return reports
+
+def main():
+    parser = argparse.ArgumentParser(description='Извлечение результатов из PDF протоколов в CSV')
+    parser.add_argument('patterns', nargs='*', default=DEFAULT_PATTERNS, help='Шаблоны PDF файлов')
+    parser.add_argument('--csv', nargs='+', default=['data/**/*.csv'], help='Существующие CSV для сравнения')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT_DIR, help='Каталог для CSV и diff.csv')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help='Каталог кэша извлеченных протоколов')
+    parser.add_argument('--workers', type=int, default=0, help='Количество процессов (по умолчанию - число ядер)')
+    parser.add_argument('--rebuild', action='store_true', help='Обработать протоколы заново, не читая кэш')
+    args = parser.parse_args()
+
+    try:
+        reports = ingest(args.patterns, args.csv, args.output, args.cache_dir, args.workers, args.rebuild)
+        print('PDF,Строк,Отличий,Кэш,Замечания')
+        for report in reports:
+            print(f"{report['pdf']},{report['rows']},{report['diffs']},"
+                  f"{'да' if report['cached'] else 'нет'},{'; '.join(report['warnings'])}")
+        print(f"Отличия: {Path(args.output) / 'diff.csv'}")
+    except Exception as e:
+        print(f"Ошибка: {str(e)}")
+        exit(1)
+
+if __name__ == '__main__':
+    main()
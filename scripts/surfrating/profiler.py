@@ -0,0 +1,113 @@
+import cProfile
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+from output import primary_output
+
+class StageProfiler:
+    """Замеряет этапы конвейера: время, процессорное время и пиковую память.
+
+    Память считается через tracemalloc только с trace_memory, пик
+    сбрасывается перед каждым этапом. С dump_stats каждый этап выполняется
+    под cProfile, а в файл сохраняется профиль самого долгого этапа.
+    Трассировка замедляет этапы, поэтому в метриках отмечается, под какой
+    из них измерено время. Выключенный профилировщик ничего не делает.
+    """
+
+    def __init__(self, enabled: bool = False, dump_stats: bool = False, trace_memory: bool = False):
+        self.enabled = enabled
+        self.dump_stats = enabled and dump_stats
+        self.trace_memory = enabled and trace_memory
+        self.stages = []
+        self.counters = {}
+        self.files = {}
+        self._profiles = {}
+
+    def start(self) -> None:
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name: str):
+        if not self.enabled:
+            yield
+            return
+
+        profile = cProfile.Profile() if self.dump_stats else None
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        wall, cpu = time.perf_counter(), time.process_time()
+        if profile:
+            profile.enable()
+        try:
+            yield
+        finally:
+            if profile:
+                profile.disable()
+                self._profiles[name] = profile
+            self.stages.append({
+                'name': name,
+                'wall_seconds': round(time.perf_counter() - wall, 6),
+                'cpu_seconds': round(time.process_time() - cpu, 6),
+                'peak_mb': round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 3) if self.trace_memory else None
+            })
+
+    def count(self, **counters: int) -> None:
+        if self.enabled:
+            self.counters.update(counters)
+
+    def record_files(self, paths: Iterable) -> None:
+        if not self.enabled:
+            return
+        for path in paths:
+            if os.path.exists(path):
+                self.files[str(path)] = os.path.getsize(path)
+
+    def slowest_stage(self) -> Optional[str]:
+        if not self.stages:
+            return None
+        return max(self.stages, key=lambda s: s['wall_seconds'])['name']
+
+    def save(self, metrics_path: Path, config_paths: List[str]) -> Optional[Path]:
+        """Сохраняет метрики в JSON (и профиль самого долгого этапа в .prof рядом)"""
+        if not self.enabled:
+            return None
+        if self.trace_memory:
+            tracemalloc.stop()
+
+        metrics_path.parent.mkdir(parents=True, exist_ok=True)
+        profile_path = None
+        slowest = self.slowest_stage()
+        if slowest in self._profiles:
+            profile_path = metrics_path.with_suffix('.prof')
+            self._profiles[slowest].dump_stats(str(profile_path))
+
+        metrics: Dict = {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'config': config_paths,
+            'stages': self.stages,
+            'total': {
+                'wall_seconds': round(sum(s['wall_seconds'] for s in self.stages), 6),
+                'cpu_seconds': round(sum(s['cpu_seconds'] for s in self.stages), 6),
+                'peak_mb': max((s['peak_mb'] for s in self.stages), default=0) if self.trace_memory else None
+            },
+            'timed_under': [name for name, active in (('tracemalloc', self.trace_memory), ('cprofile', self.dump_stats))
+                            if active],
+            'counters': self.counters,
+            'output_files': self.files,
+            'slowest_stage': slowest,
+            'cprofile': str(profile_path) if profile_path else None
+        }
+        with open(metrics_path, 'w', encoding='utf-8') as f:
+            json.dump(metrics, f, ensure_ascii=False, indent=2)
+        return metrics_path
+
+def metrics_path(config: Dict) -> Path:
+    """Файл метрик рядом с основным CSV: men.csv -> men.metrics.json"""
+    csv_path = primary_output(config)
+    return csv_path.with_name(f"{csv_path.stem}.metrics.json")
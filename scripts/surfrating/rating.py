@@ -1,8 +1,11 @@
 import argparse
+import traceback
 from config_loader import load_config
-from data_parser import parse_files
+from data_parser import parse_files, parse_stats
 from calculations import process_athletes
 from output import generate_output
+from helpers import date_fallbacks
+from profiler import StageProfiler, metrics_path
 
 def setup_arg_parser() -> argparse.Namespace:
     parser = argparse.ArgumentParser(
@@ -19,22 +22,171 @@ def setup_arg_parser() -> argparse.Namespace:
         action='store_true',
         help='Включить подробный вывод'
     )
-    return parser.parse_args()
+    parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help='Пересчитать рейтинг только с учетом новых входных файлов (состояние хранится в каталоге кэша)'
+    )
+    parser.add_argument(
+        '--verify',
+        action='store_true',
+        help='Вместе с --incremental сверить результат с полным пересчетом'
+    )
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help='Замерить время и процессорное время по этапам '
+             'и сохранить метрики в JSON рядом с результатами'
+    )
+    parser.add_argument(
+        '--profile-memory',
+        action='store_true',
+        help='Вместе с --profile замерить пиковую память по этапам (tracemalloc замедляет этапы, '
+             'время в метриках помечается как измеренное под трассировкой)'
+    )
+    parser.add_argument(
+        '--profile-dump',
+        action='store_true',
+        help='Вместе с --profile сохранить профиль cProfile самого долгого этапа (.prof)'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Не использовать кэш разобранных файлов'
+    )
+    parser.add_argument(
+        '--rebuild-cache',
+        action='store_true',
+        help='Разобрать все файлы заново и перезаписать кэш'
+    )
+    parser.add_argument(
+        '--build-all',
+        metavar='BUILD_CONFIG',
+        help='Собрать все рейтинги из файла сборки (например, conf/build.yaml) и обновить индекс'
+    )
+    parser.add_argument(
+        '--watch',
+        metavar='BUILD_CONFIG',
+        help='Собрать все рейтинги из файла сборки и пересобирать затронутые '
+             'при изменении данных или конфигов (до Ctrl+C)'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=0,
+        help='Количество процессов для --build-all (по умолчанию - число ядер)'
+    )
+    parser.add_argument(
+        '--matrix',
+        nargs='+',
+        action='append',
+        metavar='CONFIG',
+        help='Набор альтернативных конфигов (или key=value); можно указать несколько раз, '
+             'рейтинг считается для всех сочетаний'
+    )
+    parser.add_argument(
+        '--matrix-output',
+        default='output/matrix',
+        help='Каталог для результатов режима --matrix'
+    )
+    args = parser.parse_args()
+    if args.verify and not args.incremental:
+        parser.error('--verify используется только вместе с --incremental')
+    if (args.profile_memory or args.profile_dump) and not args.profile:
+        parser.error('--profile-memory и --profile-dump используются только вместе с --profile')
+    return args
+
+def report_date_fallbacks() -> None:
+    if not date_fallbacks:
+        return
+    print(f"Значений дат, разобранных через pandas: {sum(date_fallbacks.values())}")
+    for value, count in date_fallbacks.most_common():
+        print(f"  {value!r}: {count}")
+
+def report_default_events(config: dict) -> None:
+    defaulted = config['event_group_matcher'].defaulted
+    if not defaulted:
+        return
+    print(f"События без группы (default): {len(defaulted)}")
+    for event_name, count in defaulted.most_common():
+        print(f"  {event_name}: {count}")
 
 def main():
+    args = setup_arg_parser()
     try:
-        args              = setup_arg_parser()
-        config            = load_config(args.config)
-        data, events_info = parse_files(config)
-        results           = process_athletes(data, config)
+        overrides = []
+        if args.no_cache:
+            overrides.append('cache.enabled=false')
+        if args.rebuild_cache:
+            overrides.append('cache.rebuild=true')
+        args.config.extend(overrides)
+
+        if args.build_all:
+            from build import build_all
+            if not build_all(args.build_all, args.workers, overrides):
+                exit(1)
+            return
+
+        if args.watch:
+            from watch import watch
+            watch(args.watch, overrides)
+            return
+
+        if args.matrix:
+            from matrix import run_matrix
+            run_matrix(args.config, args.matrix, args.matrix_output)
+            return
+
+        profiler = StageProfiler(args.profile, args.profile_dump, args.profile_memory)
+        profiler.start()
+
+        with profiler.stage('load_config'):
+            config = load_config(args.config)
+        if args.incremental:
+            from incremental import update_ranking, verify_ranking
+            with profiler.stage('update_ranking'):
+                results, event_store = update_ranking(config, args.verbose)
+            if args.verify:
+                with profiler.stage('verify'):
+                    verify_ranking(results, config)
+        else:
+            with profiler.stage('parse_files'):
+                data, event_store = parse_files(config)
+            with profiler.stage('process_athletes'):
+                results = process_athletes(data, config)
+        with profiler.stage('generate_output'):
+            written = generate_output(results, config, event_store)
+        if config.get('history', {}).get('enabled'):
+            if args.incremental:
+                print("История мест не строится в режиме --incremental")
+            else:
+                from history import save_history
+                with profiler.stage('save_history'):
+                    written.append(save_history(data, config, event_store))
 
-        for idx, athlete in enumerate(results, 1):
-            athlete["rank"] = idx
+        if args.profile:
+            profiler.count(
+                files_read=parse_stats['files_read'],
+                files_skipped=parse_stats['files_skipped'],
+                rows_parsed=parse_stats['rows_parsed'],
+                rows_skipped_events=parse_stats['rows_skipped_events'],
+                athletes=len(results),
+                results=sum(len(y['events']) for athlete in results for y in athlete['years'].values()),
+                events=len(event_store)
+            )
+            profiler.record_files(written)
+        saved = profiler.save(metrics_path(config), args.config)
+        if saved:
+            print(f"Метрики сохранены: {saved}")
 
-        generate_output(results, config, events_info)
+        if args.verbose:
+            report_date_fallbacks()
+            report_default_events(config)
 
     except Exception as e:
         print(f"Ошибка: {str(e)}")
+        if args.verbose:
+            traceback.print_exc()
         exit(1)
 
 if __name__ == '__main__':
@@ -0,0 +1,239 @@
+import argparse
+import glob
+import os
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+from helpers import glob_match, has_csv_columns
+from parse_cache import file_digest
+
+DEFAULT_DB = '.cache/surfrating/results.sqlite'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path   TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    rows   INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS athletes (
+    id   INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS events (
+    id         TEXT PRIMARY KEY,
+    name       TEXT NOT NULL,
+    year       INTEGER NOT NULL,
+    date       TEXT NOT NULL,
+    discipline TEXT NOT NULL,
+    category   TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    id         INTEGER PRIMARY KEY,
+    file       TEXT NOT NULL REFERENCES files(path),
+    row        INTEGER NOT NULL,
+    event_id   TEXT NOT NULL REFERENCES events(id),
+    athlete_id INTEGER NOT NULL REFERENCES athletes(id),
+    year       INTEGER NOT NULL,
+    place      TEXT NOT NULL,
+    region     TEXT NOT NULL,
+    sport_rank TEXT NOT NULL,
+    birth_year INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_athlete_year ON results(athlete_id, year);
+CREATE INDEX IF NOT EXISTS results_event ON results(event_id);
+CREATE INDEX IF NOT EXISTS results_file_row ON results(file, row);
+CREATE INDEX IF NOT EXISTS events_discipline_category_year ON events(discipline, category, year);
+"""
+
+ROWS_QUERY = """
+SELECT e.id, e.name, r.year, e.date, e.discipline, e.category,
+       r.place, a.name, r.region, r.sport_rank, r.birth_year
+FROM results r
+JOIN events e ON e.id = r.event_id
+JOIN athletes a ON a.id = r.athlete_id
+"""
+
+# Место числом; DNS и нечисловые места - NULL, поэтому не входят в MIN и AVG
+NUMERIC_PLACE = "CASE WHEN r.place != '' AND r.place NOT GLOB '*[^0-9]*' THEN CAST(r.place AS INTEGER) END"
+
+def connect(db_path: str) -> sqlite3.Connection:
+    Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA)
+    return conn
+
+def _store_file(conn: sqlite3.Connection, file_path: str, digest: str, rows: List[list]) -> None:
+    """Заменяет строки файла в базе; rows - результат data_parser._parse_file"""
+    conn.execute("DELETE FROM results WHERE file = ?", (file_path,))
+    conn.execute("INSERT OR REPLACE INTO files (path, sha256, rows) VALUES (?, ?, ?)",
+                 (file_path, digest, len(rows)))
+
+    names = {row[7] for row in rows}
+    conn.executemany("INSERT OR IGNORE INTO athletes (name) VALUES (?)", ((name,) for name in names))
+    athlete_ids = dict(conn.execute("SELECT name, id FROM athletes"))
+
+    conn.executemany(
+        "INSERT OR IGNORE INTO events (id, name, year, date, discipline, category) VALUES (?, ?, ?, ?, ?, ?)",
+        (row[:6] for row in rows)
+    )
+    conn.executemany(
+        "INSERT INTO results (file, row, event_id, athlete_id, year, place, region, sport_rank, birth_year) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (
+            (file_path, idx, row[0], athlete_ids[row[7]], row[2], row[6], row[8], row[9], row[10])
+            for idx, row in enumerate(rows)
+        )
+    )
+
+def _drop_file(conn: sqlite3.Connection, file_path: str) -> None:
+    conn.execute("DELETE FROM results WHERE file = ?", (file_path,))
+    conn.execute("DELETE FROM files WHERE path = ?", (file_path,))
+
+def ingest(db_path: str, patterns: Sequence[str]) -> Tuple[int, int, int]:
+    """Загружает CSV в базу; неизмененные файлы пропускаются, исчезнувшие удаляются.
+
+    CSV без столбцов результатов (таблица псевдонимов, сводные таблицы)
+    не загружаются. Если измененный файл не удалось разобрать, его прежние
+    строки удаляются из базы, а не остаются устаревшими.
+    Возвращает количество загруженных, пропущенных и удаленных файлов.
+    """
+    from data_parser import _parse_file, REQUIRED_COLUMNS
+
+    files = sorted({f for pattern in patterns for f in glob.glob(pattern, recursive=True)})
+    loaded = unchanged = 0
+
+    with closing(connect(db_path)) as conn, conn:
+        known = dict(conn.execute("SELECT path, sha256 FROM files"))
+        for file_path in files:
+            if not has_csv_columns(file_path, REQUIRED_COLUMNS):
+                if file_path in known:
+                    _drop_file(conn, file_path)
+                continue
+            digest = file_digest(file_path)
+            if known.get(file_path) == digest:
+                unchanged += 1
+                continue
+            try:
+                rows = _parse_file(file_path)
+            except (ValueError, KeyError, AttributeError) as e:
+                print(f"Пропущен файл {file_path}: {str(e)}")
+                _drop_file(conn, file_path)
+                continue
+            _store_file(conn, file_path, digest, rows)
+            loaded += 1
+
+        removed = [path for path in known if not os.path.exists(path)]
+        for path in removed:
+            _drop_file(conn, path)
+
+    return loaded, unchanged, len(removed)
+
+def _select_files(conn: sqlite3.Connection, patterns: Sequence[str]) -> Dict[str, int]:
+    """Файлы базы, подходящие под шаблоны, с порядковым номером чтения.
+
+    Шаблоны сопоставляются так же, как в parse_files (glob.glob без recursive),
+    порядок - по шаблонам, затем по имени файла.
+    """
+    paths = sorted(path for (path,) in conn.execute("SELECT path FROM files"))
+    selected = {}
+    for pattern in patterns:
+        for path in paths:
+            if glob_match(path, pattern):
+                selected.setdefault(path, len(selected))
+    return selected
+
+def _filters(db_config: Dict) -> Tuple[List[str], List]:
+    conditions, params = [], []
+    for key, column in (('discipline', 'e.discipline'), ('category', 'e.category')):
+        if db_config.get(key):
+            conditions.append(f"{column} = ?")
+            params.append(db_config[key])
+    if db_config.get('years'):
+        conditions.append(f"r.year IN ({','.join('?' * len(db_config['years']))})")
+        params.extend(db_config['years'])
+    if db_config.get('where'):
+        conditions.append(f"({db_config['where']})")
+    return conditions, params
+
+def query_rows(config: Dict) -> List[list]:
+    """Строки результатов из базы в формате data_parser.ParsedRow.
+
+    По умолчанию файлы отбираются по тем же шаблонам input_paths и с той же
+    семантикой, что в parse_files; порядок строк совпадает с чтением файлов:
+    по шаблонам, затем по имени файла и номеру строки.
+    """
+    db_config = config['input_db']
+    patterns = db_config.get('files', config.get('input_paths', []))
+    conditions, params = _filters(db_config)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+
+    with closing(connect(db_config.get('path', DEFAULT_DB))) as conn:
+        join, order = '', 'r.file, r.row'
+        if patterns:
+            conn.execute("CREATE TEMP TABLE selected_files (path TEXT PRIMARY KEY, position INTEGER NOT NULL)")
+            conn.executemany("INSERT INTO selected_files (path, position) VALUES (?, ?)",
+                             _select_files(conn, patterns).items())
+            join, order = 'JOIN selected_files s ON s.path = r.file', 's.position, r.row'
+        return [list(row) for row in conn.execute(f"{ROWS_QUERY} {join} {where} ORDER BY {order}", params)]
+
+def athlete_results(conn: sqlite3.Connection, name: str) -> List[tuple]:
+    """Все результаты спортсмена по всем дисциплинам"""
+    return conn.execute("""
+        SELECT r.year, e.date, e.name, e.discipline, e.category, r.place, r.file
+        FROM results r
+        JOIN athletes a ON a.id = r.athlete_id
+        JOIN events e ON e.id = r.event_id
+        WHERE a.name = ?
+        ORDER BY r.year, e.date
+    """, (name,)).fetchall()
+
+def year_summary(conn: sqlite3.Connection) -> List[tuple]:
+    """Итоги по дисциплине, категории и году: события, спортсмены, старты, DNS,
+    лучшее и среднее место по числовым местам"""
+    return conn.execute(f"""
+        SELECT e.discipline, e.category, r.year,
+               COUNT(DISTINCT r.event_id),
+               COUNT(DISTINCT r.athlete_id),
+               SUM(r.place != 'DNS'),
+               SUM(r.place = 'DNS'),
+               MIN({NUMERIC_PLACE}),
+               ROUND(AVG({NUMERIC_PLACE}), 2)
+        FROM results r
+        JOIN events e ON e.id = r.event_id
+        GROUP BY e.discipline, e.category, r.year
+        ORDER BY e.discipline, e.category, r.year
+    """).fetchall()
+
+def main():
+    parser = argparse.ArgumentParser(description='База результатов соревнований (SQLite)')
+    parser.add_argument('--db', default=DEFAULT_DB, help='Путь к файлу базы')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    ingest_parser = commands.add_parser('ingest', help='Загрузить CSV в базу')
+    ingest_parser.add_argument('patterns', nargs='*', default=['data/**/*.csv'], help='Шаблоны файлов')
+    athlete_parser = commands.add_parser('athlete', help='Все результаты спортсмена')
+    athlete_parser.add_argument('name', help='Фамилия и имя')
+    commands.add_parser('summary', help='Итоги по дисциплинам, категориям и годам')
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'ingest':
+            loaded, unchanged, removed = ingest(args.db, args.patterns)
+            print(f"Загружено файлов: {loaded}, без изменений: {unchanged}, удалено: {removed}")
+        elif args.command == 'athlete':
+            with closing(connect(args.db)) as conn:
+                print('Год,Дата,Событие,Дисциплина,Категория,Место,Файл')
+                for row in athlete_results(conn, args.name):
+                    print(','.join(map(str, row)))
+        else:
+            with closing(connect(args.db)) as conn:
+                print('Дисциплина,Категория,Год,Событий,Спортсменов,Стартов,DNS,Лучшее место,Среднее место')
+                for row in year_summary(conn):
+                    print(','.join(map(str, row)))
+    except Exception as e:
+        print(f"Ошибка: {str(e)}")
+        exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,323 @@
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+from typing import Dict, List, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+from helpers import generate_athlete_id
+from json_writer import dumps_compact
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 1000
+GZIP_MIN_SIZE = 512
+MAX_CACHED_RESPONSES = 4096
+
+STATUS_TEXT = {200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed'}
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+def _ranking_files(root: str) -> List[Dict]:
+    """Рейтинги из index.json (indexer.generate_index) или, если его нет, из каталогов"""
+    index_path = os.path.join(root, 'index.json')
+    if os.path.exists(index_path):
+        with open(index_path, 'r', encoding='utf-8') as f:
+            return json.load(f)['rankings']
+
+    entries = []
+    for dirpath, _, filenames in os.walk(root):
+        parts = os.path.relpath(dirpath, root).split(os.sep)
+        if len(parts) < 3:
+            continue
+        for filename in sorted(filenames):
+            if filename.startswith('ranking_') and filename.endswith('.json'):
+                gender = filename[len('ranking_'):-len('.json')]
+                entries.append({
+                    'id': '_'.join(parts[:3] + [gender]),
+                    'path': os.path.join(*parts, filename)
+                })
+    return entries
+
+def signature(root: str) -> Tuple:
+    """Размеры и времена изменения index.json и файлов рейтингов"""
+    paths = [os.path.join(root, 'index.json')]
+    try:
+        paths += [os.path.join(root, entry['path']) for entry in _ranking_files(root)]
+    except (OSError, ValueError, KeyError):
+        pass
+    stats = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            stats.append((path, stat.st_size, stat.st_mtime_ns))
+        except OSError:
+            stats.append((path, None, None))
+    return tuple(stats)
+
+def _place_key(result: Dict) -> Tuple:
+    place = result['place']
+    return (not isinstance(place, int), place if isinstance(place, int) else 0)
+
+def ranking_view(meta: Dict, data: Dict) -> Dict:
+    """Индексы одного рейтинга: общий список, спортсмены, годы и события"""
+    overall, athletes, names = [], {}, {}
+    for entry in data['overall_ranking']:
+        athlete_id = entry.get('id') or generate_athlete_id(entry['name'], entry.get('birth_year', ''))
+        entry = {**entry, 'id': athlete_id}
+        overall.append(entry)
+        athletes[athlete_id] = {**entry, 'years': {}}
+        names[entry['name']] = athlete_id
+
+    years, events = {}, {}
+    for year, year_ranking in data['year_rankings'].items():
+        entries = []
+        for entry in year_ranking['athletes']:
+            athlete_id = entry.get('id') or generate_athlete_id(entry['name'], entry.get('birth_year', ''))
+            athlete = athletes.get(athlete_id, {})
+            entry = {
+                'id': athlete_id,
+                **{key: athlete[key] for key in ('name', 'region', 'sport_rank', 'birth_year') if key in athlete},
+                **entry
+            }
+            entries.append(entry)
+            if athlete:
+                athlete['years'][year] = {
+                    'rank': entry['rank'],
+                    'year_points': entry['year_points'],
+                    'events': entry['events']
+                }
+            for event in entry['events']:
+                events.setdefault((str(year), event['event_name']), []).append({
+                    'id': athlete_id,
+                    'name': entry.get('name'),
+                    'region': entry.get('region'),
+                    'place': event['place'],
+                    'points': event['points'],
+                    'group': event.get('group'),
+                    'participants_count': event.get('participants_count')
+                })
+        years[str(year)] = entries
+
+    for results in events.values():
+        results.sort(key=_place_key)
+
+    return {
+        'meta': {**meta, 'last_updated': data.get('last_updated')},
+        'overall': overall,
+        'athletes': athletes,
+        'names': names,
+        'years': years,
+        'events': events
+    }
+
+def load_snapshot(root: str) -> Dict:
+    """Все рейтинги каталога в памяти; responses - ответы, посчитанные для этого снимка"""
+    sig = signature(root)
+    rankings = {}
+    for meta in _ranking_files(root):
+        with open(os.path.join(root, meta['path']), 'r', encoding='utf-8') as f:
+            rankings[meta['id']] = ranking_view(meta, json.load(f))
+    return {'signature': sig, 'rankings': rankings, 'responses': {}}
+
+def _int_param(query: Dict, name: str, default: int, maximum: int = MAX_LIMIT) -> int:
+    try:
+        value = int(query.get(name, [default])[0])
+    except ValueError:
+        raise HttpError(400, f"параметр {name} должен быть целым числом")
+    if value < 0:
+        raise HttpError(400, f"параметр {name} не может быть отрицательным")
+    return min(value, maximum)
+
+def _page(items: List, query: Dict) -> Dict:
+    offset = _int_param(query, 'offset', 0, len(items))
+    limit = _int_param(query, 'limit', DEFAULT_LIMIT)
+    return {'total': len(items), 'offset': offset, 'limit': limit, 'items': items[offset:offset + limit]}
+
+def route(snapshot: Dict, path: str, query: Dict) -> object:
+    """Данные ответа для пути запроса"""
+    parts = [unquote(part) for part in path.strip('/').split('/') if part]
+    rankings = snapshot['rankings']
+
+    if parts == ['rankings']:
+        return {'rankings': [view['meta'] for view in rankings.values()]}
+    if len(parts) < 2 or parts[0] != 'rankings':
+        raise HttpError(404, "неизвестный путь")
+
+    view = rankings.get(parts[1])
+    if view is None:
+        raise HttpError(404, f"рейтинг {parts[1]} не найден")
+    rest = parts[2:]
+
+    if not rest:
+        return {**view['meta'], **_page(view['overall'], query)}
+    if rest == ['top']:
+        return {**view['meta'], 'items': view['overall'][:_int_param(query, 'n', 10)]}
+    if rest[0] == 'athletes' and len(rest) == 2:
+        athlete_id = rest[1] if rest[1] in view['athletes'] else view['names'].get(rest[1])
+        if athlete_id is None:
+            raise HttpError(404, f"спортсмен {rest[1]} не найден")
+        return view['athletes'][athlete_id]
+    if rest == ['years']:
+        return {'years': [{'year': year, 'athletes': len(entries)} for year, entries in sorted(view['years'].items())]}
+    if rest[0] == 'years' and len(rest) == 2:
+        if rest[1] not in view['years']:
+            raise HttpError(404, f"год {rest[1]} не найден")
+        return {'year': rest[1], **_page(view['years'][rest[1]], query)}
+    if rest == ['events']:
+        return {'events': [
+            {'year': year, 'event_name': name, 'results': len(results)}
+            for (year, name), results in sorted(view['events'].items())
+        ]}
+    if rest[0] == 'events' and len(rest) == 3:
+        results = view['events'].get((rest[1], rest[2]))
+        if results is None:
+            raise HttpError(404, f"событие {rest[2]} ({rest[1]}) не найдено")
+        return {'year': rest[1], 'event_name': rest[2], 'results': results}
+    raise HttpError(404, "неизвестный путь")
+
+def _encode(payload: object) -> Tuple[str, bytes, bytes]:
+    body = dumps_compact(payload).encode('utf-8')
+    etag = hashlib.sha1(body).hexdigest()[:20]
+    return etag, body, gzip.compress(body, mtime=0) if len(body) >= GZIP_MIN_SIZE else None
+
+class RankingServer:
+    """HTTP API над рейтингами из каталога output/rankings.
+
+    Снимок данных загружается целиком и заменяется одним присваиванием,
+    поэтому запросы видят либо старые, либо новые рейтинги. Готовые ответы
+    (тело, gzip и ETag) запоминаются в снимке и считаются один раз.
+    """
+
+    def __init__(self, root: str, reload_interval: float = 1.0):
+        self.root = root
+        self.reload_interval = reload_interval
+        self.snapshot = load_snapshot(root)
+
+    async def watch_outputs(self) -> None:
+        """Перечитывает рейтинги, когда меняются файлы в каталоге"""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                if await loop.run_in_executor(None, signature, self.root) == self.snapshot['signature']:
+                    continue
+                self.snapshot = await loop.run_in_executor(None, load_snapshot, self.root)
+                print(f"Рейтинги перезагружены: {len(self.snapshot['rankings'])}")
+            except (OSError, ValueError, KeyError) as e:
+                # Файлы могут быть записаны не до конца - попробуем в следующий раз
+                print(f"Рейтинги не перезагружены: {str(e)}")
+
+    def respond(self, method: str, target: str, headers: Dict[str, str]) -> Tuple[int, List[Tuple[str, str]], bytes]:
+        if method not in ('GET', 'HEAD'):
+            return self._error(405, "поддерживаются только GET и HEAD")
+
+        url = urlsplit(target)
+        query = parse_qs(url.query)
+        snapshot = self.snapshot
+        key = (url.path, tuple(sorted((k, tuple(v)) for k, v in query.items())))
+        cached = snapshot['responses'].get(key)
+        if cached is None:
+            try:
+                cached = _encode(route(snapshot, url.path, query))
+            except HttpError as e:
+                return self._error(e.status, str(e))
+            if len(snapshot['responses']) >= MAX_CACHED_RESPONSES:
+                snapshot['responses'].clear()
+            snapshot['responses'][key] = cached
+
+        etag, body, compressed = cached
+        use_gzip = compressed is not None and 'gzip' in headers.get('accept-encoding', '')
+        etag = f'"{etag}-gzip"' if use_gzip else f'"{etag}"'
+        response_headers = [
+            ('Content-Type', 'application/json; charset=utf-8'),
+            ('ETag', etag),
+            ('Cache-Control', 'no-cache'),
+            ('Vary', 'Accept-Encoding')
+        ]
+        if etag in (tag.strip() for tag in headers.get('if-none-match', '').split(',')):
+            return 304, response_headers, b''
+        if use_gzip:
+            response_headers.append(('Content-Encoding', 'gzip'))
+            body = compressed
+        return 200, response_headers, body
+
+    def _error(self, status: int, message: str) -> Tuple[int, List[Tuple[str, str]], bytes]:
+        body = dumps_compact({'error': message}).encode('utf-8')
+        return status, [('Content-Type', 'application/json; charset=utf-8')], body
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                    break
+                lines = head.decode('latin-1').split('\r\n')
+                try:
+                    method, target, version = lines[0].split(' ', 2)
+                except ValueError:
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    if ':' in line:
+                        name, value = line.split(':', 1)
+                        headers[name.strip().lower()] = value.strip()
+
+                status, response_headers, body = self.respond(method, target, headers)
+                # Тело запроса не читается, поэтому после запроса с телом соединение закрывается
+                has_body = headers.get('content-length', '0') != '0' or 'transfer-encoding' in headers
+                keep_alive = (
+                    version == 'HTTP/1.1' and method in ('GET', 'HEAD') and not has_body
+                    and headers.get('connection', '').lower() != 'close'
+                )
+                response_headers += [
+                    ('Content-Length', str(len(body))),
+                    ('Connection', 'keep-alive' if keep_alive else 'close')
+                ]
+                writer.write(f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n".encode('latin-1'))
+                writer.write(''.join(f"{name}: {value}\r\n" for name, value in response_headers).encode('latin-1'))
+                writer.write(b'\r\n')
+                if method != 'HEAD':
+                    writer.write(body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+async def serve(root: str, host: str, port: int, reload_interval: float) -> None:
+    app = RankingServer(root, reload_interval)
+    server = await asyncio.start_server(app.handle, host, port)
+    print(f"Рейтингов загружено: {len(app.snapshot['rankings'])}, адрес: http://{host}:{port}/rankings")
+    async with server:
+        await asyncio.gather(server.serve_forever(), app.watch_outputs())
+
+def main():
+    parser = argparse.ArgumentParser(description='HTTP API рейтингов (JSON, ETag, gzip)')
+    parser.add_argument('--root', default='output/rankings', help='Каталог рейтингов с index.json')
+    parser.add_argument('--host', default='127.0.0.1', help='Адрес')
+    parser.add_argument('--port', type=int, default=8080, help='Порт')
+    parser.add_argument('--reload-interval', type=float, default=1.0,
+                        help='Как часто проверять изменения рейтингов (секунды)')
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.root, args.host, args.port, args.reload_interval))
+    except KeyboardInterrupt:
+        print("Остановлено")
+    except Exception as e:
+        print(f"Ошибка: {str(e)}")
+        exit(1)
+
+if __name__ == '__main__':
+    main()
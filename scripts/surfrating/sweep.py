@@ -0,0 +1,289 @@
+import argparse
+import copy
+import csv
+import itertools
+from pathlib import Path
+from typing import Dict, List, Tuple
+import numpy as np
+import yaml
+from calculations import encode_place, apply_sport_rank_bonus, _best_results
+from config_loader import load_config
+from data_parser import parse_files
+from model import AthleteTable
+
+# Параметры, которые пересчитываются без повторного разбора данных
+SWEEP_PREFIXES = ('bonuses.decay.', 'bonuses.participant_factor.', 'bonuses.participation.')
+
+def parse_values(spec: str) -> List:
+    """'0.5,0.6' - список значений, '0.5:0.9:0.1' - диапазон с шагом (включая конец)"""
+    if spec.count(':') == 2:
+        start, stop, step = map(float, spec.split(':'))
+        steps = int(round((stop - start) / step))
+        return [round(start + i * step, 10) for i in range(steps + 1)]
+    return [yaml.safe_load(value) for value in spec.split(',')]
+
+def _check_param(key: str, config: Dict) -> None:
+    parts = key.split('.')
+    is_coefficient = len(parts) == 3 and parts[0] == 'event_groups' and parts[2] == 'coefficient'
+    if is_coefficient and parts[1] not in config['event_groups']:
+        raise ValueError(f"параметр {key}: нет группы событий {parts[1]}")
+    if is_coefficient:
+        return
+    if not key.startswith(SWEEP_PREFIXES):
+        raise ValueError(f"параметр {key} не поддерживается перебором")
+    node = config
+    for part in parts:
+        if isinstance(node, list) and part.isdigit() and int(part) < len(node):
+            node = node[int(part)]
+        elif isinstance(node, dict) and part in node:
+            node = node[part]
+        else:
+            raise ValueError(f"параметр {key}: нет ключа {part} в конфигурации")
+
+def build_grid(specs: List[str], config: Dict) -> List[Dict]:
+    """Все сочетания значений параметров вида 'ключ=значения'; группы событий и ключи бонусов проверяются по config"""
+    keys, values = [], []
+    for spec in specs:
+        key, value = spec.split('=', 1)
+        _check_param(key, config)
+        keys.append(key)
+        values.append(parse_values(value))
+    return [dict(zip(keys, combo)) for combo in itertools.product(*values)]
+
+def _set_path(config: Dict, key_path: str, value) -> None:
+    """Присваивает значение по пути через точку; числа в пути - индексы списков"""
+    node = config
+    *parents, last = key_path.split('.')
+    for key in parents:
+        node = node[int(key)] if isinstance(node, list) else node.setdefault(key, {})
+    if isinstance(node, list):
+        node[int(last)] = value
+    else:
+        node[last] = value
+
+def _parameters(config: Dict, overrides: Dict) -> Dict:
+    """Разделы конфигурации, влияющие на очки, с примененными значениями точки сетки"""
+    params = copy.deepcopy({'event_groups': config['event_groups'], 'bonuses': config['bonuses']})
+    for key_path, value in overrides.items():
+        _set_path(params, key_path, value)
+    return params
+
+class SweepMatrix:
+    """Результаты, разобранные один раз, в виде массивов для пересчета рейтинга.
+
+    Очки за результат зависят только от места, группы события, числа
+    участников и года, поэтому для точки сетки достаточно пересчитать
+    коэффициенты и сложить очки по спортсменам - сразу для пачки точек.
+    Система подсчета, годы, разрядные бонусы и сортировка берутся из
+    базовой конфигурации.
+    """
+
+    def __init__(self, table: AthleteTable, config: Dict):
+        allowed_years = config.get('allowed_years')
+        mask = np.isin(table.year, list(allowed_years)) if allowed_years else np.ones(len(table.year), dtype=bool)
+
+        scoring = config['scoring_tables'][config['scoring_system']]
+        place_codes = table.place[mask]
+        place_lut = np.array([encode_place(p, scoring['max_place']) for p in table.places.values], dtype=np.intp)
+        place_num_lut = np.array([int(p) if p.isdigit() else -1 for p in table.places.values], dtype=np.int64)
+
+        self.config = config
+        self.names = list(table.names.values)
+        self.n_athletes = len(table)
+        self.athlete = table.athlete[mask].astype(np.int64)
+        self.years = table.year[mask].astype(np.int64)
+        self.unique_years, self.year_idx = np.unique(self.years, return_inverse=True)
+        self.group_names = list(table.groups.values)
+        self.place_num = place_num_lut[place_codes]
+
+        # Очки результата определяются группой, местом, числом участников и
+        # годом: считаем их для уникальных сочетаний, а не для каждой строки
+        group = table.group[mask].astype(np.int64)
+        place = place_lut[place_codes].astype(np.int64)
+        counts = table.participants_count[mask].astype(np.int64)
+        key = ((group * (scoring['max_place'] + 2) + place) * (counts.max(initial=0) + 1) + counts) \
+            * len(self.unique_years) + self.year_idx
+        _, first, self.combo = np.unique(key, return_index=True, return_inverse=True)
+
+        self.group = group[first]
+        self.base = scoring['base'][place[first]]
+        self.counts = counts[first]
+        self.combo_year_idx = self.year_idx[first]
+        self.is_dns = np.array([p == 'DNS' for p in table.places.values], dtype=bool)[place_codes[first]]
+
+        zeros = np.zeros(self.n_athletes, dtype=np.int64)
+        self.bonus = apply_sport_rank_bonus(zeros, table.sport_rank, table.sport_ranks.values, config)
+        self.last_year = zeros.copy()
+        np.maximum.at(self.last_year, self.athlete, self.years)
+
+        # Лучшее числовое место и его год не зависят от очков; у спортсменов
+        # без числовых мест лучший результат выбирается по очкам
+        best = _best_results(self.athlete, self.years, self.place_num, np.zeros(len(self.years)), self.n_athletes)
+        self.best_place = np.r_[self.place_num, -1][best]
+        self.best_place = np.where(self.best_place >= 0, self.best_place, 9999)
+        self.best_year = np.r_[self.years, 0][best]
+        has_num = np.bincount(self.athlete, weights=self.place_num >= 0, minlength=self.n_athletes) > 0
+        self.free_rows = np.flatnonzero(~has_num[self.athlete])
+
+    def points(self, grid: List[Dict]) -> np.ndarray:
+        """Очки за каждое сочетание результата для каждой точки сетки, форма (точки, сочетания)"""
+        params = [_parameters(self.config, overrides) for overrides in grid]
+
+        coefficients = np.array([
+            [p['event_groups'].get(name, {}).get('coefficient', 1.0) for name in self.group_names]
+            for p in params
+        ], dtype=float)
+        points = np.rint(coefficients[:, self.group] * self.base)
+
+        factors = np.ones(points.shape)
+        for row, p in zip(factors, params):
+            pf = p['bonuses']['participant_factor']
+            if not pf['enabled']:
+                continue
+            matched = np.zeros(len(row), dtype=bool)
+            for rule in pf['rules']:
+                max_p = rule['max'] if rule['max'] != "inf" else float('inf')
+                rule_mask = ~matched & (self.counts >= rule['min']) & (self.counts <= max_p)
+                row[rule_mask] = rule['factor']
+                matched |= rule_mask
+        points = np.rint(points * factors)
+
+        current_year = self.config['current_year']
+        decay = np.array([
+            [p['bonuses']['decay']['factor'] ** (current_year - int(year)) if p['bonuses']['decay']['enabled'] else 1.0
+             for year in self.unique_years]
+            for p in params
+        ]).reshape(len(params), len(self.unique_years))
+        points = np.rint(points * decay[:, self.combo_year_idx])
+
+        participation = np.array([
+            p['bonuses']['participation']['points'] if p['bonuses']['participation']['enabled'] else 0
+            for p in params
+        ])
+        points = points + np.where(self.is_dns, 0, participation[:, None])
+        return points.astype(np.int64)
+
+    def ranks(self, grid: List[Dict]) -> np.ndarray:
+        """Места спортсменов (с 1) для каждой точки сетки, форма (точки, спортсмены)"""
+        points = self.points(grid)
+        n_points, n = len(grid), self.n_athletes
+        totals = np.vstack([
+            np.bincount(self.athlete, weights=row[self.combo], minlength=n) for row in points
+        ]).astype(np.int64).reshape(n_points, n) + self.bonus
+
+        ranks = np.empty((n_points, n), dtype=np.int64)
+        positions = np.arange(1, n + 1)
+        free = self.free_rows
+        for g in range(n_points):
+            if self.config['sorting']['enabled']:
+                best_year = self.best_year
+                if len(free):
+                    best_year = best_year.copy()
+                    best = _best_results(self.athlete[free], self.years[free], self.place_num[free],
+                                         points[g, self.combo[free]], n)
+                    best_year[best >= 0] = self.years[free][best[best >= 0]]
+                order = np.lexsort((-best_year, -self.last_year, self.best_place, -totals[g]))
+            else:
+                order = np.argsort(-totals[g], kind='stable')
+            ranks[g, order] = positions
+        return ranks
+
+def _inversions(values: np.ndarray) -> np.ndarray:
+    """Число инверсий в каждой строке-перестановке 0..n-1.
+
+    Сортировка слиянием снизу вверх сразу для всех строк: на каждом уровне
+    элементы правого блока пары ищутся в отсортированном левом через
+    searchsorted, ключи блоков не пересекаются за счет смещения block * n.
+    """
+    n_rows, n = values.shape
+    values = values.astype(np.int64)
+    inversions = np.zeros(n_rows, dtype=np.int64)
+    idx = np.arange(n)
+    width = 1
+    while width < n:
+        pair = idx // (2 * width)
+        is_right = (idx // width) % 2 == 1
+        block = np.arange(n_rows)[:, None] * (pair[-1] + 1) + pair
+        keys = block * n + values
+        left = keys[:, ~is_right].ravel()
+        greater_from = np.searchsorted(left, keys[:, is_right].ravel(), side='right')
+        pair_end = np.searchsorted(left, ((block[:, is_right] + 1) * n).ravel(), side='left')
+        inversions += (pair_end - greater_from).reshape(n_rows, -1).sum(axis=1)
+        values = np.sort(keys, axis=1) - block * n
+        width *= 2
+    return inversions
+
+def kendall_tau(baseline: np.ndarray, ranks: np.ndarray) -> np.ndarray:
+    """Kendall tau базового рейтинга с каждой строкой ranks (места без совпадений)"""
+    n = len(baseline)
+    if n < 2:
+        return np.ones(len(ranks))
+    return 1 - 4 * _inversions(ranks[:, np.argsort(baseline)] - 1) / (n * (n - 1))
+
+def sweep(table: AthleteTable, config: Dict, grid: List[Dict], top_n: int = 5, chunk: int = 64) -> Tuple[List[Dict], np.ndarray]:
+    """Сравнивает рейтинг в каждой точке сетки с рейтингом базовой конфигурации.
+
+    Возвращает строки отчета и матрицу мест (точки, спортсмены).
+    """
+    matrix = SweepMatrix(table, config)
+    baseline = matrix.ranks([{}])[0]
+    baseline_top = baseline <= top_n
+    ranks = np.vstack([matrix.ranks(grid[i:i + chunk]) for i in range(0, len(grid), chunk)]) \
+        if grid else np.empty((0, matrix.n_athletes), dtype=np.int64)
+
+    shifts = np.abs(ranks - baseline)
+    taus = np.concatenate([kendall_tau(baseline, ranks[i:i + chunk]) for i in range(0, len(grid), chunk)] or [[]])
+    rows = []
+    for g, overrides in enumerate(grid):
+        top = np.argsort(ranks[g])[:top_n]
+        rows.append({
+            **overrides,
+            'changed': int(np.count_nonzero(shifts[g])),
+            'max_shift': int(shifts[g].max(initial=0)),
+            'mean_shift': round(float(shifts[g].mean()), 2) if matrix.n_athletes else 0.0,
+            'top_overlap': int(np.count_nonzero(baseline_top & (ranks[g] <= top_n))),
+            'kendall_tau': round(float(taus[g]), 4),
+            'top': [matrix.names[i] for i in top]
+        })
+    return rows, ranks
+
+def save_report(rows: List[Dict], params: List[str], top_n: int, output_path: Path) -> None:
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow([*params, 'Changed', 'Max Shift', 'Mean Shift', f'Top-{top_n} Overlap',
+                         'Kendall Tau', f'Top-{top_n}'])
+        for row in rows:
+            writer.writerow([*(row[p] for p in params), row['changed'], row['max_shift'], row['mean_shift'],
+                             row['top_overlap'], row['kendall_tau'], '; '.join(row['top'])])
+
+def main():
+    parser = argparse.ArgumentParser(description='Перебор параметров начисления очков')
+    parser.add_argument('--config', nargs='+', required=True, help='Базовые конфигурационные файлы')
+    parser.add_argument('--param', action='append', default=[], required=True,
+                        help="Параметр и значения: 'bonuses.decay.factor=0.5:0.9:0.1' или "
+                             "'event_groups.regional.coefficient=0.5,0.7,1.0'")
+    parser.add_argument('--top', type=int, default=5, help='Размер топа для сравнения')
+    parser.add_argument('--output', default='output/sweep/sweep.csv', help='Файл отчета')
+    args = parser.parse_args()
+
+    try:
+        config = load_config(args.config)
+        grid = build_grid(args.param, config)
+        table, _ = parse_files(config)
+        rows, _ = sweep(table, config, grid, args.top)
+
+        params = list(grid[0]) if grid else []
+        save_report(rows, params, args.top, Path(args.output))
+        print(','.join([*params, 'Изменений места', 'Макс. сдвиг', 'Средний сдвиг',
+                        f'Совпадение топ-{args.top}', 'Kendall tau', f'Топ-{args.top}']))
+        for row in rows:
+            print(','.join(map(str, [*(row[p] for p in params), row['changed'], row['max_shift'],
+                                     row['mean_shift'], row['top_overlap'], row['kendall_tau'],
+                                     '; '.join(row['top'])])))
+    except Exception as e:
+        print(f"Ошибка: {str(e)}")
+        exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+import argparse
+import random
+from pathlib import Path
+from typing import List
+
+HEADER = [
+    'Год',
+    'Дата',
+    'Событие',
+    'Место проведения',
+    'Вид спорта',
+    'Дисциплина',
+    'Категория',
+    'Место',
+    'ФИО',
+    'Год рождения',
+    'Разряд',
+    'Регион'
+]
+
+LAST_NAMES = ['Иванов', 'Смирнов', 'Кузнецов', 'Попов', 'Васильев', 'Петров', 'Соколов', 'Михайлов',
+              'Новиков', 'Федоров', 'Морозов', 'Волков', 'Алексеев', 'Лебедев', 'Семенов', 'Егоров']
+FIRST_NAMES = ['Александр', 'Дмитрий', 'Максим', 'Сергей', 'Андрей', 'Алексей', 'Артем', 'Илья',
+               'Кирилл', 'Михаил', 'Никита', 'Матвей', 'Роман', 'Егор', 'Арсений', 'Иван']
+MIDDLE_NAMES = ['Александрович', 'Дмитриевич', 'Сергеевич', 'Андреевич', 'Игоревич', '']
+REGIONS = ['Санкт-Петербург', 'Москва', 'Калининградская область', 'Приморский край',
+           'Камчатский край', 'Краснодарский край', 'Московская область', 'Мурманская область']
+SPORT_RANKS = ['МС', 'КМС', '1', '2', '3', '']
+EVENTS = [
+    ('Чемпионат России', 'Владивосток'),
+    ('Кубок Ленинградской области', 'Зеленогорск'),
+    ('Региональный этап', 'Калининград'),
+    ('Кубок Санкт-Петербурга', 'Сестрорецк'),
+    ('Открытый чемпионат Сочи', 'Сочи'),
+    ('Локальные соревнования', 'Светлогорск')
+]
+
+def _athlete_name(idx: int) -> str:
+    last = LAST_NAMES[idx % len(LAST_NAMES)]
+    first = FIRST_NAMES[(idx // len(LAST_NAMES)) % len(FIRST_NAMES)]
+    suffix = idx // (len(LAST_NAMES) * len(FIRST_NAMES))
+    middle = MIDDLE_NAMES[idx % len(MIDDLE_NAMES)]
+    return ' '.join(part for part in (f"{last}{suffix or ''}", first, middle) if part)
+
+def _birth_year(rng: random.Random) -> str:
+    year = rng.randint(1965, 2012)
+    kind = rng.random()
+    if kind < 0.8:
+        return str(year)
+    if kind < 0.95:
+        return f"{rng.randint(1, 28):02d}.{rng.randint(1, 12):02d}.{year}"
+    return ''
+
+def generate_dataset(output_dir: str, rows: int, athletes: int = 0, events_per_year: int = 0,
+                     years: int = 7, dns_rate: float = 0.05, discipline: str = 'длинная доска',
+                     category: str = 'мужчины', seed: int = 0) -> List[str]:
+    """Генерирует CSV с результатами в формате data/: по файлу на год.
+
+    Спортсмены выбираются с перекосом, поэтому одни и те же люди выступают
+    из года в год; часть строк - DNS. Возвращает список созданных файлов.
+    """
+    rng = random.Random(seed)
+    athletes = athletes or max(rows // 20, 10)
+    events_per_year = events_per_year or max(rows // (years * 60), 1)
+    rows_per_event = max(rows // (years * events_per_year), 1)
+    last_year = 2024
+
+    profiles = [
+        (_athlete_name(i), _birth_year(rng), rng.choice(SPORT_RANKS), rng.choice(REGIONS))
+        for i in range(athletes)
+    ]
+    weights = [1.0 / (i + 1) ** 0.5 for i in range(athletes)]
+
+    out = Path(output_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    files = []
+    written = 0
+
+    for year in range(last_year - years + 1, last_year + 1):
+        file_path = out / f"synthetic_{year}.csv"
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write('|'.join(HEADER) + '\n')
+            for event_idx in range(events_per_year):
+                if written >= rows:
+                    break
+                base_name, location = EVENTS[event_idx % len(EVENTS)]
+                event_name = base_name if event_idx < len(EVENTS) else f"{base_name} №{event_idx // len(EVENTS) + 1}"
+                month = 5 + event_idx % 6
+                day = 1 + event_idx % 20
+                event_date = f"{year}.{month:02d}.{day:02d}-{day + 5:02d}"
+
+                count = min(rows_per_event, rows - written, athletes)
+                entrants = set()
+                while len(entrants) < count:
+                    entrants.update(rng.choices(range(athletes), weights=weights, k=count - len(entrants)))
+
+                place = 0
+                for athlete in entrants:
+                    name, birth_year, sport_rank, region = profiles[athlete]
+                    if rng.random() < dns_rate:
+                        result = 'DNS'
+                    else:
+                        place += 1
+                        result = str(place)
+                    f.write('|'.join([
+                        str(year), event_date, event_name, location, 'серфинг', discipline, category,
+                        result, name, birth_year, sport_rank, region
+                    ]) + '\n')
+                written += count
+        files.append(str(file_path))
+
+    return files
+
+def main():
+    parser = argparse.ArgumentParser(description='Генератор синтетических результатов соревнований')
+    parser.add_argument('output_dir', help='Каталог для CSV файлов')
+    parser.add_argument('--rows', type=int, default=10000, help='Количество строк результатов')
+    parser.add_argument('--athletes', type=int, default=0, help='Количество спортсменов (по умолчанию rows / 20)')
+    parser.add_argument('--events', type=int, default=0, help='Количество событий в год')
+    parser.add_argument('--years', type=int, default=7, help='Количество лет')
+    parser.add_argument('--dns-rate', type=float, default=0.05, help='Доля DNS')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    files = generate_dataset(args.output_dir, args.rows, args.athletes, args.events,
+                             args.years, args.dns_rate, seed=args.seed)
+    print('\n'.join(files))
+
+if __name__ == '__main__':
+    main()
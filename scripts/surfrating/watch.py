@@ -0,0 +1,256 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+from typing import Dict, Iterable, List, Set, Tuple
+from config_loader import load_config, _yaml_load, _is_override, _read_config_file
+from data_parser import input_key
+from helpers import glob_match
+from build import discover_targets, build_group, report_targets
+
+DEFAULT_WATCH = {'paths': ['data', 'conf'], 'debounce': 0.5, 'poll_interval': 1.0}
+
+# Флаги inotify из <sys/inotify.h>
+IN_MODIFY      = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM  = 0x00000040
+IN_MOVED_TO    = 0x00000080
+IN_CREATE      = 0x00000100
+IN_DELETE      = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_ISDIR       = 0x40000000
+IN_EVENTS = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+
+_EVENT_HEADER = struct.Struct('iIII')
+
+def _walk_dirs(roots: Iterable[str]) -> Iterable[str]:
+    for root in roots:
+        for dirpath, _, _ in os.walk(root):
+            yield dirpath
+
+def _walk_files(roots: Iterable[str]) -> Iterable[str]:
+    for root in roots:
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                yield os.path.join(dirpath, filename)
+
+class InotifyWatcher:
+    """Изменения файлов через inotify (Linux, вызовы libc через ctypes).
+
+    Каталоги отслеживаются рекурсивно; в новые каталоги наблюдение
+    добавляется по событию создания, их файлы сразу считаются измененными.
+    """
+
+    def __init__(self, roots: List[str]):
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1')
+        self.dirs = {}
+        for dirpath in _walk_dirs(roots):
+            self._add(dirpath)
+
+    def _add(self, dirpath: str) -> None:
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(dirpath), IN_EVENTS)
+        if wd >= 0:
+            self.dirs[wd] = dirpath
+
+    def changes(self, timeout: float) -> Set[str]:
+        """Измененные пути за время ожидания (пустое множество, если событий не было)"""
+        changed = set()
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return changed
+
+        data = os.read(self.fd, 64 * 1024)
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, name_len = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + name_len].rstrip(b'\0'))
+            offset += name_len
+
+            dirpath = self.dirs.get(wd)
+            if dirpath is None:
+                continue
+            if mask & IN_DELETE_SELF:
+                del self.dirs[wd]
+                continue
+            path = os.path.join(dirpath, name)
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    for new_dir in _walk_dirs([path]):
+                        self._add(new_dir)
+                    changed.update(_walk_files([path]))
+                continue
+            changed.add(path)
+        return changed
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+class PollingWatcher:
+    """Изменения файлов по сравнению размера и времени изменения раз в interval секунд"""
+
+    def __init__(self, roots: List[str], interval: float):
+        self.roots = roots
+        self.interval = interval
+        self.snapshot = self._scan()
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        snapshot = {}
+        for path in _walk_files(self.roots):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            snapshot[path] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+    def changes(self, timeout: float) -> Set[str]:
+        time.sleep(min(timeout, self.interval))
+        snapshot = self._scan()
+        changed = {
+            path for path in snapshot.keys() | self.snapshot.keys()
+            if snapshot.get(path) != self.snapshot.get(path)
+        }
+        self.snapshot = snapshot
+        return changed
+
+    def close(self) -> None:
+        pass
+
+def create_watcher(roots: List[str], poll_interval: float):
+    try:
+        return InotifyWatcher(roots)
+    except (OSError, AttributeError, TypeError):
+        print("inotify недоступен, изменения отслеживаются опросом файлов")
+        return PollingWatcher(roots, poll_interval)
+
+def _normalize(path: str) -> str:
+    return os.path.normpath(os.path.relpath(os.path.abspath(path)))
+
+class WatchState:
+    """Цели сборки и их собранные конфиги, которые держатся в памяти между пересборками.
+
+    Цель зависит от файлов своей цепочки конфигов, таблицы псевдонимов,
+    базы результатов и от входных CSV, подходящих под шаблоны input_paths
+    (в том числе от новых и удаленных файлов).
+    """
+
+    def __init__(self, build_config_path: str, overrides: List[str]):
+        self.build_config_path = build_config_path
+        self.overrides = list(overrides)
+        self.load_targets()
+
+    def load_targets(self) -> None:
+        with open(self.build_config_path, 'r', encoding='utf-8') as f:
+            self.build_config = _yaml_load(f)
+        self.watch = {**DEFAULT_WATCH, **(self.build_config.get('watch') or {})}
+        self.targets = dict(discover_targets(self.build_config, self.overrides))
+        self.configs = {}
+        _read_config_file.cache_clear()
+
+    def config(self, name: str) -> Dict:
+        if name not in self.configs:
+            self.configs[name] = load_config(self.targets[name])
+        return self.configs[name]
+
+    def _config_files(self, name: str) -> Set[str]:
+        files = {_normalize(path) for path in self.targets[name] if not _is_override(path)}
+        config = self.configs.get(name)
+        if config is None:
+            return files
+        identity = config.get('identity', {})
+        if identity.get('enabled') and identity.get('aliases'):
+            files.add(_normalize(identity['aliases']))
+        if config.get('input_db', {}).get('enabled'):
+            from results_db import DEFAULT_DB
+            files.add(_normalize(config['input_db'].get('path', DEFAULT_DB)))
+        return files
+
+    def _reads(self, name: str, path: str) -> bool:
+        config = self.configs.get(name)
+        if config is None or config.get('input_db', {}).get('enabled'):
+            return False
+        return any(glob_match(path, _normalize(pattern)) for pattern in config['input_paths'])
+
+    def affected(self, changed: Set[str]) -> List[str]:
+        """Цели, затронутые изменениями; новые конечные конфиги становятся целями"""
+        changed = {_normalize(path) for path in changed}
+        if _normalize(self.build_config_path) in changed:
+            self.load_targets()
+            return list(self.targets)
+
+        targets = dict(discover_targets(self.build_config, self.overrides))
+        affected = [name for name in targets if name not in self.targets]
+        for name in self.targets.keys() - targets.keys():
+            self.configs.pop(name, None)
+        self.targets = targets
+
+        config_files = {name: self._config_files(name) for name in self.targets}
+        if any(files & changed for files in config_files.values()):
+            # Разобранные YAML кэшируются на время процесса - перечитываем измененные
+            _read_config_file.cache_clear()
+
+        for name in self.targets:
+            if name in affected:
+                continue
+            config_changed = bool(config_files[name] & changed)
+            if config_changed:
+                self.configs.pop(name, None)
+            if config_changed or any(self._reads(name, path) for path in changed):
+                affected.append(name)
+        return affected
+
+    def rebuild(self, names: List[str]) -> List[Dict]:
+        """Пересобирает цели; цели с одинаковыми входными данными разбирают файлы один раз"""
+        reports, groups = [], {}
+        for name in names:
+            try:
+                groups.setdefault(input_key(self.config(name)), []).append((name, name))
+            except Exception as e:
+                reports.append({'target': name, 'seconds': 0.0, 'error': f"{type(e).__name__}: {e}"})
+
+        for group in groups.values():
+            reports.extend(build_group(group, self.config))
+        return reports
+
+def _wait_for_changes(watcher, debounce: float) -> Set[str]:
+    """Ждет первое изменение и собирает следующие, пока не наступит пауза debounce"""
+    changed = set()
+    while not changed:
+        changed = watcher.changes(timeout=3600)
+    while True:
+        more = watcher.changes(timeout=debounce)
+        if not more:
+            return changed
+        changed |= more
+
+def watch(build_config_path: str, overrides: List[str] = ()) -> None:
+    """Собирает все цели и затем пересобирает только затронутые изменениями.
+
+    Отслеживаются каталоги из раздела watch файла сборки (по умолчанию data
+    и conf); серии быстрых сохранений объединяются через паузу debounce.
+    """
+    state = WatchState(build_config_path, overrides)
+    index_root = state.build_config.get('index_root', 'output/rankings')
+    print('Цель,Время (с),Статус')
+    report_targets(state.rebuild(list(state.targets)), index_root)
+
+    roots = [root for root in state.watch['paths'] if os.path.isdir(root)]
+    watcher = create_watcher(roots, state.watch['poll_interval'])
+    print(f"Отслеживаются каталоги: {', '.join(roots)}")
+    try:
+        while True:
+            changed = _wait_for_changes(watcher, state.watch['debounce'])
+            names = state.affected(changed)
+            if not names:
+                continue
+            print(f"Изменено файлов: {len(changed)}, пересборка целей: {len(names)}")
+            report_targets(state.rebuild(names), index_root)
+    except KeyboardInterrupt:
+        print("Остановлено")
+    finally:
+        watcher.close()
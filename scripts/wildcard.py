@@ -1,45 +1,102 @@
+import argparse
 import csv
+import json
 import yaml
 from pathlib import Path
-from typing import List, Dict
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
 
 def load_config(config_path: str = 'config.yaml') -> Dict:
     with open(config_path, 'r', encoding='utf-8') as f:
         return yaml.safe_load(f)
 
-CONFIG = load_config()
+def _candidate(rank: int, name: str, region: str, best_place: Optional[int],
+               total_points: int, participation_years: Iterable[int]) -> Dict:
+    years = frozenset(participation_years)
+    return {
+        'rank': rank,
+        'name': name,
+        'region': region,
+        'best_place': best_place,
+        'last_year': max(years) if years else 0,
+        'participations': len(years),
+        'current_rank': rank,
+        'total_points': total_points,
+        'participation_years': years
+    }
 
 def parse_ranking(file_path: str) -> List[Dict]:
+    """Кандидаты из CSV рейтинга: годы участия - годы с ненулевыми очками"""
     athletes = []
     with open(file_path, 'r', encoding='utf-8') as f:
         reader = csv.DictReader(f)
         for row in reader:
-            # Обработка Best Place
-            best_place = row['Best Place'].strip()
-            best_place = int(best_place) if best_place.isdigit() else None
-
-            # Сбор лет участия
-            participation_years = []
-            for header, value in row.items():
-                if header.isdigit() and value.strip().isdigit() and int(value) > 0:
-                    participation_years.append(int(header))
-
-            athletes.append({
-                'rank': int(row['Rank']),
-                'name': row['Name'],
-                'region': row['Region'],
-                'best_place': best_place,
-                'last_year': max(participation_years) if participation_years else 0,
-                'participations': len(participation_years),
-                'current_rank': int(row['Rank']),
-                'total_points': int(row['Total Points']),
-                'participation_years': participation_years  # Добавлено ключевое поле
-            })
+            best_place = row.get('Best Place', '').strip()
+            athletes.append(_candidate(
+                int(row['Rank']),
+                row['Name'],
+                row['Region'],
+                int(best_place) if best_place.isdigit() else None,
+                int(row['Total Points']),
+                (int(header) for header, value in row.items()
+                 if header.isdigit() and value.strip().isdigit() and int(value) > 0)
+            ))
     return athletes
 
-def filter_athletes(athletes: List[Dict]) -> List[Dict]:
-    current_year = CONFIG['current_year']
-    cfg = CONFIG['wildcard']
+def _best_place(best_result: Optional[Dict]) -> Optional[int]:
+    place = (best_result or {}).get('place')
+    return place if isinstance(place, int) else None
+
+def candidates_from_results(results: List[Dict]) -> List[Dict]:
+    """Кандидаты из результатов process_athletes (без записи и чтения CSV)"""
+    return [
+        _candidate(
+            athlete.get('rank', idx),
+            athlete['name'],
+            athlete['region'],
+            _best_place(athlete['best_result']),
+            athlete['total_points'],
+            (year for year, data in athlete['years'].items() if data['year_total_points'] > 0)
+        )
+        for idx, athlete in enumerate(results, 1)
+    ]
+
+def candidates_from_ranking_json(file_path: str) -> List[Dict]:
+    """Кандидаты из ranking JSON: годы участия берутся из year_rankings"""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    def key(entry: Dict) -> str:
+        return entry.get('id') or entry['name']
+
+    years = {}
+    for year, ranking in data['year_rankings'].items():
+        for entry in ranking['athletes']:
+            if entry['year_points'] > 0:
+                years.setdefault(key(entry), []).append(int(year))
+
+    return [
+        _candidate(
+            athlete['rank'],
+            athlete['name'],
+            athlete['region'],
+            _best_place(athlete.get('best_result')),
+            athlete['total_points'],
+            years.get(key(athlete), ())
+        )
+        for athlete in data['overall_ranking']
+    ]
+
+def load_candidates(ranking_file: str) -> List[Dict]:
+    if Path(ranking_file).suffix == '.json':
+        return candidates_from_ranking_json(ranking_file)
+    return parse_ranking(ranking_file)
+
+def filter_athletes(athletes: List[Dict], current_year: int, cfg: Dict) -> List[Dict]:
+    # Годы, в которые засчитываются участия, одинаковы для всех спортсменов
+    valid_years: FrozenSet[int] = frozenset(range(
+        current_year - cfg['last_years_period'] + 1,
+        current_year + 1
+    ))
 
     filtered = []
     for athlete in athletes:
@@ -48,12 +105,7 @@ def filter_athletes(athletes: List[Dict]) -> List[Dict]:
             continue
 
         # Проверка участий за последние N лет
-        valid_years = range(
-            current_year - cfg['last_years_period'] + 1,
-            current_year + 1
-        )
-        actual_parts = sum(1 for y in valid_years if y in athlete['participation_years'])
-        if actual_parts < cfg['min_participations']:
+        if len(valid_years.intersection(athlete['participation_years'])) < cfg['min_participations']:
             continue
 
         # Проверка лучшего места
@@ -65,9 +117,29 @@ def filter_athletes(athletes: List[Dict]) -> List[Dict]:
 
     return sorted(filtered, key=lambda x: (x['best_place'] or 9999, -x['last_year']))
 
-def generate_output(results: List[Dict]):
-    output_path = Path(CONFIG['wildcard']['output_file'])
-    output_path.parent.mkdir(exist_ok=True)
+def select_wildcards(results: List[Dict], config: Dict) -> List[Dict]:
+    """Отбор по результатам process_athletes с параметрами config['wildcard']"""
+    return filter_athletes(candidates_from_results(results), config['current_year'], config['wildcard'])
+
+def wildcard_targets(cfg: Dict) -> List[Tuple[str, str]]:
+    """Пары (рейтинг, файл результата).
+
+    Рейтинги перечисляются в wildcard.rankings как {имя: путь к ranking JSON
+    или CSV}, результаты пишутся в wildcard.output_dir/<имя>.csv. Одиночные
+    ranking_file/output_file тоже поддерживаются.
+    """
+    output_dir = Path(cfg.get('output_dir', 'output/wildcard'))
+    targets = [
+        (ranking_file, str(output_dir / f"{name}.csv"))
+        for name, ranking_file in (cfg.get('rankings') or {}).items()
+    ]
+    if 'ranking_file' in cfg:
+        targets.append((cfg['ranking_file'], cfg['output_file']))
+    return targets
+
+def generate_output(results: List[Dict], output_file: str, print_console: bool = True):
+    output_path = Path(output_file)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
 
     headers = ['Wildcard', 'Rank', 'Name', 'Region', 'Best Place', 'Total Points', 'Last Year']
 
@@ -85,6 +157,9 @@ def generate_output(results: List[Dict]):
                 'Last Year': athlete['last_year']
             })
 
+    if not print_console:
+        return
+
     print(','.join(headers))
     for i, athlete in enumerate(results, 1):
         print(','.join(map(str, [
@@ -97,12 +172,22 @@ def generate_output(results: List[Dict]):
             athlete['last_year']
         ])))
 
+def run_batch(config: Dict, print_console: bool = True) -> None:
+    """Отбор wildcard для всех рейтингов из конфигурации за один запуск"""
+    cfg = config['wildcard']
+    for ranking_file, output_file in wildcard_targets(cfg):
+        if print_console:
+            print(output_file)
+        selected = filter_athletes(load_candidates(ranking_file), config['current_year'], cfg)
+        generate_output(selected, output_file, print_console)
+
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Отбор спортсменов по wildcard')
+    parser.add_argument('--config', default='config.yaml', help='Конфигурационный файл с разделом wildcard')
+    args = parser.parse_args()
+
     try:
-        ranking_file = CONFIG['wildcard']['ranking_file']
-        athletes = parse_ranking(ranking_file)
-        filtered = filter_athletes(athletes)
-        generate_output(filtered)
+        run_batch(load_config(args.config))
     except Exception as e:
         print(f"Error: {str(e)}")
         exit(1)
@@ -1,56 +1,18 @@
+// Для карточек топ-5 достаточно summary.json: лучший результат уже посчитан при сборке
 const JSON_PATHS = {
-    'shortboard_men': './data/rankings/top5/shortboard_men.json',
-    'longboard_men': './data/rankings/top5/longboard_men.json',
-    'shortboard_women': './data/rankings/top5/shortboard_women.json',
-    'longboard_women': './data/rankings/top5/longboard_women.json'
+    'shortboard_men': './data/rankings/rfs/rus/shortboard/ranking_men',
+    'longboard_men': './data/rankings/rfs/rus/longboard/ranking_men',
+    'shortboard_women': './data/rankings/rfs/rus/shortboard/ranking_women',
+    'longboard_women': './data/rankings/rfs/rus/longboard/ranking_women'
 };
 
 async function loadJSON(category) {
+    const base = JSON_PATHS[category];
     try {
-        const response = await fetch(JSON_PATHS[category]);
-        if (!response.ok) throw new Error('Ошибка сети');
+        const athletes = await loadOverallRanking(base);
 
-        const data = await response.json();
-        const currentYear = new Date().getFullYear();
-
-        return data.athletes
-            .map(athlete => {
-                let bestResult = null;
-
-                Object.entries(athlete.years || {}).forEach(([year, yearData]) => {
-                    const yearInt = parseInt(year);
-                    if (isNaN(yearInt)) return; // Пропускаем невалидные года
-
-                    const events = yearData.events || {};
-                    let yearBestPlace = Infinity;
-
-                    // Ищем лучшее место в году
-                    Object.values(events).forEach(event => {
-                        const parsedPlace = parseInt(event.place);
-                        if (!isNaN(parsedPlace)) {
-                            yearBestPlace = Math.min(yearBestPlace, parsedPlace);
-                        }
-                    });
-
-                    if (yearBestPlace === Infinity) return; // Год без валидных результатов
-
-                    // Обновляем лучший результат с учётом приоритета года
-                    if (!bestResult ||
-                        yearBestPlace < bestResult.place ||
-                        (yearBestPlace === bestResult.place && yearInt > bestResult.year)
-                    ) {
-                        bestResult = {
-                            place: yearBestPlace,
-                            year: yearInt
-                        };
-                    }
-                });
-
-                return {
-                    ...athlete,
-                    bestResult: bestResult || { place: '—', year: '—' }
-                };
-            })
+        return athletes
+            .slice()
             .sort((a, b) => a.rank - b.rank)
             .slice(0, 5)
             .map(athlete => ({
@@ -59,8 +21,8 @@ async function loadJSON(category) {
                 SportRank: athlete.sport_rank || '—',
                 Region: athlete.region,
                 TotalPoints: athlete.total_points,
-                BestResult: athlete.bestResult.year !== '—'
-                    ? `${athlete.bestResult.place} в ${athlete.bestResult.year}`
+                BestResult: athlete.best_result
+                    ? `${athlete.best_result.place} в ${athlete.best_result.event_year}`
                     : 'Нет данных'
             }));
     } catch (error) {
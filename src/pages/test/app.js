@@ -124,18 +124,22 @@ function createAthleteRow(athlete, years, athleteYearData) {
 }
 
 async function loadData(competition, category, gender) {
-    const path = `${JSON_BASE_PATH}${competition}/${category}/ranking_${gender}.json?t=${Date.now()}`;
+    const base = `${JSON_BASE_PATH}${competition}/${category}/ranking_${gender}`;
     try {
-        const response = await fetch(path);
-        const data = await response.json();
+        const data = await loadRanking(base, true);
 
         document.getElementById('last-updated').textContent = data.last_updated || '-';
 
+        const namesById = {};
+        for (const athlete of data.overall_ranking || []) {
+            if (athlete.id) namesById[athlete.id] = athlete.name;
+        }
+
         let athleteYearData = {};
         if (data.year_rankings) {
             for (const [year, yearData] of Object.entries(data.year_rankings)) {
                 for (const athlete of yearData.athletes) {
-                    const key = athlete.name;
+                    const key = athlete.name ?? namesById[athlete.id];
                     if (!athleteYearData[key]) {
                         athleteYearData[key] = {};
                     }
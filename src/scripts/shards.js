@@ -0,0 +1,36 @@
+// Загрузка рейтинга для страниц сайта: части рейтинга (summary.json и years/<год>.json),
+// а если их нет - полный ranking JSON. base - путь к рейтингу без .json
+
+async function fetchJSON(path, noCache = false) {
+    const response = await fetch(noCache ? `${path}?t=${Date.now()}` : path);
+    if (!response.ok) throw new Error(`HTTP ${response.status}: ${path}`);
+    return response.json();
+}
+
+async function loadShards(base, noCache = false) {
+    const summary = await fetchJSON(`${base}/summary.json`, noCache);
+    const shards = await Promise.all(summary.years.map(year => fetchJSON(`${base}/years/${year}.json`, noCache)));
+
+    const yearRankings = {};
+    shards.forEach(shard => {
+        yearRankings[shard.year] = { athletes: shard.athletes };
+    });
+
+    return {
+        last_updated: summary.last_updated,
+        year_rankings: yearRankings,
+        overall_ranking: summary.athletes
+    };
+}
+
+// Рейтинг в формате ranking JSON: last_updated, year_rankings, overall_ranking
+async function loadRanking(base, noCache = false) {
+    return loadShards(base, noCache).catch(() => fetchJSON(`${base}.json`, noCache));
+}
+
+// Общий рейтинг без результатов по годам (для карточек топ-5 хватает summary.json)
+async function loadOverallRanking(base, noCache = false) {
+    return fetchJSON(`${base}/summary.json`, noCache)
+        .then(summary => summary.athletes)
+        .catch(() => fetchJSON(`${base}.json`, noCache).then(data => data.overall_ranking));
+}